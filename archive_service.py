@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, insert, delete, func, or_, and_
+from models import (db, Meeting, MeetingParticipant, MeetingRoom, RoomParticipant,
+                    ArchivedMeeting, ArchivedMeetingParticipant,
+                    ArchivedMeetingRoom, ArchivedRoomParticipant)
+
+# (горячая таблица, архивная таблица, таблица участников, архив участников, внешний ключ участника)
+ARCHIVE_PLAN = (
+    (Meeting, ArchivedMeeting, MeetingParticipant, ArchivedMeetingParticipant, 'meeting_id'),
+    (MeetingRoom, ArchivedMeetingRoom, RoomParticipant, ArchivedRoomParticipant, 'room_id'),
+)
+
+
+class ArchiveIdCollisionError(Exception):
+    """В горячей таблице строка с id, который уже есть в архиве"""
+
+
+def _check_collisions(source_model, target_model, condition):
+    clashes = [row.id for row in db.session.query(source_model.id).filter(
+        condition,
+        source_model.id.in_(select(target_model.id))
+    ).limit(10)]
+    if clashes:
+        raise ArchiveIdCollisionError(
+            f"{source_model.__tablename__}: id {clashes} уже есть в {target_model.__tablename__} "
+            f"(БД создана без AUTOINCREMENT). Выполните `flask upgrade-db` и повторите архивацию."
+        )
+
+
+def _copy_rows(source_model, target_model, condition):
+    columns = [column.name for column in source_model.__table__.columns]
+    db.session.execute(
+        insert(target_model.__table__).from_select(
+            columns,
+            select(*[source_model.__table__.c[name] for name in columns]).where(condition)
+        )
+    )
+
+
+class ArchiveService:
+
+    @staticmethod
+    def archive_finished(days, batch_size=500):
+        """Перенос встреч, завершившихся более `days` дней назад, вместе с участниками.
+
+        Каждая пачка переносится в отдельной транзакции, поэтому прерванный
+        запуск можно просто повторить - уже перенесенных строк в горячих
+        таблицах нет.
+        """
+
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        stats = {}
+
+        for model, archive_model, participant_model, archive_participant_model, fk_name in ARCHIVE_PLAN:
+            archived = 0
+            archived_participants = 0
+
+            cursor = None
+            while True:
+                ids, cursor, exhausted = ArchiveService._next_batch(model, cutoff, batch_size, cursor)
+
+                if ids:
+                    fk_column = getattr(participant_model, fk_name)
+                    _check_collisions(model, archive_model, model.id.in_(ids))
+                    _check_collisions(participant_model, archive_participant_model, fk_column.in_(ids))
+                    try:
+                        _copy_rows(model, archive_model, model.id.in_(ids))
+                        _copy_rows(participant_model, archive_participant_model, fk_column.in_(ids))
+                        moved = db.session.execute(
+                            delete(participant_model).where(fk_column.in_(ids))
+                        ).rowcount
+                        db.session.execute(delete(model).where(model.id.in_(ids)))
+                        db.session.commit()
+                    except Exception:
+                        db.session.rollback()
+                        raise
+
+                    archived += len(ids)
+                    archived_participants += moved
+
+                if exhausted:
+                    break
+
+            stats[model.__tablename__] = archived
+            stats[participant_model.__tablename__] = archived_participants
+
+        return stats
+
+    @staticmethod
+    def _next_batch(model, cutoff, batch_size, cursor=None):
+        """Id следующей пачки, позиция (scheduled_time, id) для продолжения
+        и признак того, что кандидатов больше нет.
+
+        Кандидаты отбираются по индексу scheduled_time постранично, окончание
+        встречи (с учетом длительности) проверяется уже в Python. Длительности
+        разные, поэтому незавершенная встреча не означает, что все более
+        поздние тоже не завершены - такие строки просто пропускаются.
+        """
+
+        query = db.session.query(
+            model.id,
+            model.scheduled_time,
+            model.duration
+        ).filter(
+            model.scheduled_time < cutoff
+        )
+        if cursor is not None:
+            last_time, last_id = cursor
+            query = query.filter(or_(
+                model.scheduled_time > last_time,
+                and_(model.scheduled_time == last_time, model.id > last_id)
+            ))
+
+        rows = query.order_by(
+            model.scheduled_time.asc(),
+            model.id.asc()
+        ).limit(batch_size).all()
+
+        ids = [
+            row.id for row in rows
+            if row.scheduled_time + timedelta(minutes=row.duration or 60) <= cutoff
+        ]
+        if rows:
+            cursor = (rows[-1].scheduled_time, rows[-1].id)
+
+        return ids, cursor, len(rows) < batch_size
+
+    @staticmethod
+    def count_user_meetings(user_id):
+        """Число участий пользователя с учетом архива"""
+
+        hot = MeetingParticipant.query.filter_by(user_id=user_id).count()
+        archived = ArchivedMeetingParticipant.query.filter_by(user_id=user_id).count()
+        return hot + archived
+
+    @staticmethod
+    def get_user_archived_meetings(user_id, limit=None, offset=0):
+        """Архивные встречи, где пользователь был участником или модератором
+        (сначала последние). Архив только растет, поэтому страницы
+        запрашиваются через limit/offset.
+        """
+
+        joined = select(ArchivedMeetingParticipant.meeting_id).where(
+            ArchivedMeetingParticipant.user_id == user_id
+        )
+
+        query = ArchivedMeeting.query.filter(
+            or_(ArchivedMeeting.moderator_id == user_id, ArchivedMeeting.id.in_(joined))
+        ).order_by(
+            ArchivedMeeting.scheduled_time.desc(),
+            ArchivedMeeting.id.desc()
+        )
+        if limit is not None:
+            query = query.limit(limit).offset(offset)
+
+        return query.all()
+
+    @staticmethod
+    def count_participants(meetings):
+        """{(is_archived, id): число участников} одним запросом на таблицу"""
+
+        counts = {}
+        for participant_model, fk_column, is_archived in (
+            (MeetingParticipant, MeetingParticipant.meeting_id, False),
+            (ArchivedMeetingParticipant, ArchivedMeetingParticipant.meeting_id, True),
+        ):
+            ids = [meeting.id for meeting in meetings if meeting.is_archived == is_archived]
+            if not ids:
+                continue
+
+            rows = db.session.query(
+                fk_column,
+                func.count(participant_model.id)
+            ).filter(
+                fk_column.in_(ids)
+            ).group_by(fk_column).all()
+
+            counts.update({(is_archived, meeting_id): count for meeting_id, count in rows})
+
+        return counts
@@ -0,0 +1,78 @@
+"""Замер проверки пересечений расписания (MeetingService.find_schedule_conflict).
+
+    python bench_conflicts.py [--bookings 500] [--checks 500]
+
+Во временной SQLite-БД у пользователя --bookings участий во встречах
+(каждые 3 часа) и столько же чужих встреч между ними. Проверка
+выполняется для случайных слотов на всем периоде; стоимость должна
+зависеть от числа встреч в окне MAX_MEETING_DURATION, а не от истории.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from config import Config
+from models import db, User, Meeting, MeetingParticipant
+from meeting_service import MeetingService
+
+
+def populate(bookings):
+    user = User(username='bench', email='bench@example.com', password_hash='-',
+                first_name='Bench', last_name='User', age=20,
+                country='Россия', native_language='Русский')
+    db.session.add(user)
+    db.session.commit()
+
+    base = datetime(2030, 1, 1)
+    db.session.execute(Meeting.__table__.insert(), [
+        dict(title=f'Встреча {i}', topic='Кино', language='Английский', level='B1',
+             scheduled_time=base + timedelta(minutes=90 * i), duration=60, is_active=True)
+        for i in range(bookings * 2)
+    ])
+    db.session.execute(MeetingParticipant.__table__.insert(), [
+        dict(user_id=user.id, meeting_id=meeting_id)
+        for meeting_id in range(1, bookings * 2 + 1, 2)
+    ])
+    db.session.commit()
+    return user.id, base, base + timedelta(minutes=90 * bookings * 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bookings', type=int, default=500)
+    parser.add_argument('--checks', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            RATE_LIMIT_ENABLED = False
+
+        app = create_app(BenchConfig)
+        with app.app_context():
+            db.create_all()
+            user_id, first, last = populate(args.bookings)
+            span = int((last - first).total_seconds() // 60)
+
+            rng = random.Random(0)
+            timings = []
+            conflicts = 0
+            for _ in range(args.checks):
+                slot = first + timedelta(minutes=rng.randrange(span))
+                start = time.perf_counter()
+                conflicts += MeetingService.find_schedule_conflict(user_id, slot) is not None
+                timings.append((time.perf_counter() - start) * 1000)
+                db.session.expunge_all()
+
+    print(f'Участий пользователя: {args.bookings}, проверок: {args.checks}, с пересечением: {conflicts}')
+    print(f'Проверка: медиана {statistics.median(timings):.2f} мс, '
+          f'p95 {statistics.quantiles(timings, n=20)[-1]:.2f} мс, макс {max(timings):.2f} мс')
+
+
+if __name__ == '__main__':
+    main()
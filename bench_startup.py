@@ -0,0 +1,101 @@
+"""Замер холодного старта и памяти воркера.
+
+    python bench_startup.py [--runs 10]
+
+Каждый прогон - отдельный интерпретатор: импорт wsgi (create_app),
+затем первый запрос к '/'. Память воркера считается по fork() из
+предзагруженного процесса, как у gunicorn с preload_app.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r'''
+import json, os, sys, time
+
+def rss_kb(pid='self'):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+def private_kb(pid):
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            return sum(int(line.split()[1]) for line in f
+                       if line.startswith(('Private_Clean:', 'Private_Dirty:')))
+    except OSError:
+        return 0
+
+start = time.perf_counter()
+from wsgi import app
+import_ms = (time.perf_counter() - start) * 1000
+modules = len(sys.modules)
+
+client = app.test_client()
+start = time.perf_counter()
+client.get('/')
+first_request_ms = (time.perf_counter() - start) * 1000
+
+read_fd, write_fd = os.pipe()
+pid = os.fork()
+if pid == 0:
+    os.close(read_fd)
+    app.test_client().get('/')
+    os.write(write_fd, b'x')
+    time.sleep(0.5)
+    os._exit(0)
+os.close(write_fd)
+os.read(read_fd, 1)
+worker_private_kb = private_kb(pid)
+os.waitpid(pid, 0)
+
+print(json.dumps({
+    'import_ms': import_ms,
+    'first_request_ms': first_request_ms,
+    'rss_kb': rss_kb(),
+    'worker_private_kb': worker_private_kb,
+    'modules': modules,
+}))
+'''
+
+
+def run_probe(env):
+    output = subprocess.check_output(
+        [sys.executable, '-c', PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Отдельная пустая БД - замер не должен зависеть от содержимого рабочей
+    env.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+    results = [run_probe(env) for _ in range(args.runs)]
+
+    print(f'Прогонов: {args.runs}')
+    for key, title, unit in (
+        ('import_ms', 'Холодный старт (import wsgi)', 'мс'),
+        ('first_request_ms', 'Первый запрос', 'мс'),
+        ('rss_kb', 'RSS процесса после старта', 'КБ'),
+        ('worker_private_kb', 'Собственная память воркера после fork', 'КБ'),
+        ('modules', 'Загружено модулей', ''),
+    ):
+        values = [result[key] for result in results]
+        print(f'{title}: медиана {statistics.median(values):.1f} {unit}, '
+              f'мин {min(values):.1f}, макс {max(values):.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta
+import hashlib
+import secrets
+from sqlalchemy import select, or_, union_all, literal, null
+from models import db, User, Meeting, MeetingParticipant, MeetingRoom, RoomParticipant
+
+FEED_BATCH_SIZE = 100
+ICS_LINE_LIMIT = 75
+
+
+def mark_participation_changed(user_ids):
+    """Сдвигает отметку изменения участий (инвалидирует ETag календаря).
+
+    Коммит не выполняется - изменение попадает в транзакцию вызывающего кода.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    db.session.query(User).filter(User.id.in_(user_ids)).update(
+        {User.participations_changed_at: datetime.utcnow()},
+        synchronize_session=False
+    )
+
+
+def _escape_text(value):
+    return (value or '').replace('\\', '\\\\')\
+        .replace(';', '\\;')\
+        .replace(',', '\\,')\
+        .replace('\r\n', '\\n')\
+        .replace('\n', '\\n')
+
+
+def _fold_line(line):
+    """Перенос строк длиннее 75 октетов по RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= ICS_LINE_LIMIT:
+        return line + '\r\n'
+
+    parts = []
+    current = ''
+    current_size = 0
+    limit = ICS_LINE_LIMIT
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if current_size + char_size > limit:
+            parts.append(current)
+            current = ''
+            current_size = 0
+            limit = ICS_LINE_LIMIT - 1  # пробел в начале строки продолжения
+        current += char
+        current_size += char_size
+    parts.append(current)
+
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _format_time(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+class CalendarFeedService:
+
+    @staticmethod
+    def get_or_create_token(user):
+        """Секретный токен календарной подписки пользователя"""
+
+        if not user.calendar_token:
+            user.calendar_token = secrets.token_urlsafe(32)
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        return user.calendar_token
+
+    @staticmethod
+    def find_feed_owner(token):
+        """Только id и отметка изменения - полная загрузка пользователя не нужна"""
+
+        if not token:
+            return None
+
+        return db.session.query(
+            User.id,
+            User.participations_changed_at
+        ).filter(
+            User.calendar_token == token,
+            User.is_active == True
+        ).first()
+
+    @staticmethod
+    def compute_etag(owner):
+        """ETag зависит от последнего изменения участий и текущей даты,
+        чтобы прошедшие встречи выпадали из ленты не позднее чем через сутки"""
+
+        changed_at = owner.participations_changed_at or datetime.min
+        raw = f"{owner.id}:{changed_at.isoformat()}:{datetime.utcnow().date().isoformat()}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def iter_feed(user_id):
+        """Построчная генерация .ics из потокового курсора"""
+
+        yield _fold_line('BEGIN:VCALENDAR')
+        yield _fold_line('VERSION:2.0')
+        yield _fold_line('PRODID:-//CulturaBridge//Meetings//RU')
+        yield _fold_line('CALSCALE:GREGORIAN')
+        yield _fold_line('X-WR-CALNAME:' + _escape_text('CulturaBridge - мои встречи'))
+
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # Встречи и тематические комнаты, которые пользователь ведет или забронировал
+        joined_meetings = select(MeetingParticipant.meeting_id).where(
+            MeetingParticipant.user_id == user_id
+        )
+        meetings = select(
+            literal('meeting').label('kind'),
+            Meeting.id,
+            Meeting.title,
+            Meeting.description,
+            Meeting.topic,
+            Meeting.language,
+            Meeting.scheduled_time,
+            Meeting.duration,
+            Meeting.telemost_link
+        ).where(
+            Meeting.is_active == True,
+            Meeting.scheduled_time >= today,
+            or_(Meeting.moderator_id == user_id, Meeting.id.in_(joined_meetings))
+        )
+
+        joined_rooms = select(RoomParticipant.room_id).where(
+            RoomParticipant.user_id == user_id
+        )
+        rooms = select(
+            literal('room').label('kind'),
+            MeetingRoom.id,
+            MeetingRoom.title,
+            MeetingRoom.description,
+            MeetingRoom.topic,
+            MeetingRoom.language,
+            MeetingRoom.scheduled_time,
+            MeetingRoom.duration,
+            null().label('telemost_link')
+        ).where(
+            MeetingRoom.is_active == True,
+            MeetingRoom.scheduled_time >= today,
+            or_(MeetingRoom.moderator_id == user_id, MeetingRoom.id.in_(joined_rooms))
+        )
+
+        bookings = union_all(meetings, rooms).subquery()
+        stmt = select(bookings).order_by(bookings.c.scheduled_time.asc())
+
+        dtstamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+        rows = db.session.execute(
+            stmt,
+            execution_options={'stream_results': True, 'yield_per': FEED_BATCH_SIZE}
+        )
+        for row in rows:
+            yield CalendarFeedService._render_event(row, dtstamp)
+
+        yield _fold_line('END:VCALENDAR')
+
+    @staticmethod
+    def _render_event(row, dtstamp):
+        end_time = row.scheduled_time + timedelta(minutes=row.duration or 60)
+        description = row.description or ''
+        if row.telemost_link:
+            description = f"{description}\n\n{row.telemost_link}".strip()
+
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:{row.kind}-{row.id}@culturabridge',
+            f'DTSTAMP:{dtstamp}',
+            f'DTSTART:{_format_time(row.scheduled_time)}',
+            f'DTEND:{_format_time(end_time)}',
+            'SUMMARY:' + _escape_text(row.title),
+            'DESCRIPTION:' + _escape_text(description),
+            'CATEGORIES:' + _escape_text(row.topic) + ',' + _escape_text(row.language),
+        ]
+        if row.telemost_link:
+            lines.append('LOCATION:' + _escape_text(row.telemost_link))
+            lines.append('URL:' + row.telemost_link)
+        lines.append('END:VEVENT')
+
+        return ''.join(_fold_line(line) for line in lines)
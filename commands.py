@@ -0,0 +1,80 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from models import db
+from archive_service import ArchiveService, ArchiveIdCollisionError
+from schema_upgrade import upgrade_schema
+from rating_service import RatingService
+
+# Команды обслуживания. Схема БД больше не создается при импорте приложения -
+# только явно через `flask init-db` / `flask reset-db`.
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Создание недостающих таблиц и индексов"""
+    db.create_all()
+    click.echo('✅ Таблицы созданы')
+
+@click.command('reset-db')
+@click.option('--yes', is_flag=True, help='Не запрашивать подтверждение')
+@with_appcontext
+def reset_db_command(yes):
+    """Пересоздание всех таблиц (данные будут удалены)"""
+    if not yes:
+        click.confirm('Все данные будут удалены. Продолжить?', abort=True)
+
+    db.drop_all()
+    db.create_all()
+    click.echo('✅ База данных пересоздана')
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db_command():
+    """Приведение существующей БД к текущим моделям (колонки, индексы, AUTOINCREMENT)"""
+    steps = upgrade_schema()
+    for step in steps:
+        click.echo(step)
+    click.echo('✅ Схема актуальна' if steps else '✅ Изменений не требуется')
+
+@click.command('archive-meetings')
+@click.option('--days', type=int, default=None, help='Архивировать встречи, завершившиеся более N дней назад')
+@click.option('--batch-size', type=int, default=None, help='Размер пачки (одна транзакция на пачку)')
+@with_appcontext
+def archive_meetings_command(days, batch_size):
+    """Перенос завершенных встреч и их участников в архивные таблицы"""
+    days = days if days is not None else current_app.config['ARCHIVE_AFTER_DAYS']
+    batch_size = batch_size or current_app.config['ARCHIVE_BATCH_SIZE']
+
+    try:
+        stats = ArchiveService.archive_finished(days, batch_size)
+    except ArchiveIdCollisionError as e:
+        raise click.ClickException(str(e))
+    for table, count in stats.items():
+        click.echo(f'{table}: перенесено {count}')
+
+@click.command('rebuild-reputation')
+@click.option('--check', is_flag=True, help='Только проверить согласованность, ничего не меняя')
+@with_appcontext
+def rebuild_reputation_command(check):
+    """Пересчет агрегатов репутации модераторов и тем по оценкам участников"""
+    mismatches = RatingService.rebuild_reputation(dry_run=check)
+    for table, count in mismatches.items():
+        click.echo(f'{table}: расхождений {count}')
+
+    if check and any(mismatches.values()):
+        raise SystemExit(1)
+
+
+COMMANDS = (
+    init_db_command,
+    reset_db_command,
+    upgrade_db_command,
+    archive_meetings_command,
+    rebuild_reputation_command,
+)
+
+
+def register_commands(app):
+    for command in COMMANDS:
+        app.cli.add_command(command)
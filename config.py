@@ -2,5 +2,42 @@ import os
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///database.db'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///database.db'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Верхняя граница длительности встречи (минуты) - ограничивает окно поиска пересечений
+    MAX_MEETING_DURATION = 240
+    
+    # Архивация: встречи, завершившиеся более N дней назад, переносятся в *_archive
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 30))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+    # Сколько архивных встреч показывать на одной странице "Мои встречи"
+    ARCHIVE_PAGE_SIZE = 20
+    
+    # Байесовское среднее репутации: (сумма + WEIGHT * MEAN) / (число оценок + WEIGHT)
+    REPUTATION_PRIOR_MEAN = 3.0
+    REPUTATION_PRIOR_WEIGHT = 5
+    
+    # Ограничение частоты запросов (rate_limit.py): лимиты по IP и по аккаунту
+    # для эндпоинтов, принимающих неаутентифицированный трафик.
+    # 'memory' - token bucket в процессе, 'local' - скользящее окно поверх
+    # локальной замены общего хранилища. Оба варианта считают лимит в каждом
+    # воркере отдельно (при N воркерах фактический лимит в N раз больше),
+    # поэтому под gunicorn/uwsgi нужен 'redis' - общее скользящее окно по
+    # RATE_LIMIT_STORAGE_URL (например redis://localhost:6379/0, пакет redis)
+    RATE_LIMIT_ENABLED = True
+    RATE_LIMIT_STORAGE_URL = os.environ.get('RATE_LIMIT_STORAGE_URL')
+    RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'redis' if RATE_LIMIT_STORAGE_URL else 'memory')
+    RATE_LIMIT_MAX_KEYS = 10000
+    RATE_LIMITS = {
+        'accounts.login': {'methods': ['POST'], 'ip': '20/minute', 'account': '5/minute', 'account_field': 'username'},
+        'accounts.register': {'methods': ['POST'], 'ip': '5/minute', 'account': '3/minute', 'account_field': 'email'},
+        'api.check_username': {'ip': '60/minute'},
+        'api.check_email': {'ip': '60/minute'},
+    }
+    
+    # Число доверенных обратных прокси перед приложением. Лимит 'ip' берется из
+    # request.remote_addr: за nginx это адрес прокси и все клиенты делят один
+    # лимит. При значении > 0 адрес клиента читается из X-Forwarded-For
+    # (werkzeug ProxyFix) - включайте, только если заголовок ставит ваш прокси
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
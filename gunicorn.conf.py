@@ -0,0 +1,11 @@
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+# Лимиты запросов в памяти считаются в каждом воркере отдельно - для общего
+# лимита задайте RATE_LIMIT_STORAGE_URL (см. config.py)
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Приложение импортируется один раз в мастере, воркеры получают его через fork
+# (copy-on-write). Пул соединений пересоздается хуком из process_state.py.
+preload_app = True
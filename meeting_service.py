@@ -1,5 +1,9 @@
 from datetime import datetime, timedelta
-from models import db, MeetingRoom, RoomParticipant, User, Meeting, MeetingParticipant
+from flask import current_app
+from sqlalchemy import exists, or_
+from models import db, MeetingRoom, RoomParticipant, User, Meeting, MeetingParticipant, ModeratorReputation
+from rating_service import RatingService
+from calendar_feed import mark_participation_changed
 
 class MeetingService:
     
@@ -18,6 +22,10 @@ class MeetingService:
         if scheduled_time <= datetime.utcnow():
             return None, "Время встречи должно быть в будущем"
         
+        max_duration = current_app.config['MAX_MEETING_DURATION']
+        if duration > max_duration:
+            return None, f"Длительность встречи не может превышать {max_duration} минут"
+        
         room = MeetingRoom(
             title=title,
             description=description,
@@ -32,6 +40,12 @@ class MeetingService:
         )
         
         try:
+            MeetingService.lock_schedule(user_id)
+            conflict = MeetingService.find_schedule_conflict(user_id, scheduled_time, duration)
+            if conflict:
+                db.session.rollback()
+                return None, MeetingService.conflict_message(conflict)
+            
             db.session.add(room)
             db.session.flush()
             
@@ -71,6 +85,12 @@ class MeetingService:
             return False, "Вы уже присоединились к этой встрече"
         
         try:
+            MeetingService.lock_schedule(user_id)
+            conflict = MeetingService.find_schedule_conflict(user_id, room.scheduled_time, room.duration)
+            if conflict:
+                db.session.rollback()
+                return False, MeetingService.conflict_message(conflict)
+            
             participant = RoomParticipant(
                 user_id=user_id,
                 room_id=room_id
@@ -86,6 +106,110 @@ class MeetingService:
             db.session.rollback()
             return False, f"Ошибка при присоединении: {str(e)}"
     
+    @staticmethod
+    def join_meeting(user_id, meeting_id):
+        """Присоединение пользователя к встрече"""
+        
+        meeting = Meeting.query.get(meeting_id)
+        if not meeting:
+            return False, "Встреча не найдена"
+        
+        if not meeting.is_active:
+            return False, "Эта встреча отменена"
+        
+        if meeting.scheduled_time <= datetime.utcnow():
+            return False, "Встреча уже началась или завершилась"
+        
+        existing = MeetingParticipant.query.filter_by(
+            user_id=user_id,
+            meeting_id=meeting_id
+        ).first()
+        
+        if existing or meeting.moderator_id == user_id:
+            return False, "Вы уже присоединились к этой встрече"
+        
+        participant_count = MeetingParticipant.query.filter_by(meeting_id=meeting_id).count()
+        if participant_count >= (meeting.max_participants or 6):
+            return False, "Встреча заполнена"
+        
+        try:
+            MeetingService.lock_schedule(user_id)
+            conflict = MeetingService.find_schedule_conflict(user_id, meeting.scheduled_time, meeting.duration)
+            if conflict:
+                db.session.rollback()
+                return False, MeetingService.conflict_message(conflict)
+            
+            participant = MeetingParticipant(
+                user_id=user_id,
+                meeting_id=meeting_id
+            )
+            
+            db.session.add(participant)
+            db.session.commit()
+            
+            return True, "Вы успешно присоединились к встрече"
+        except Exception as e:
+            db.session.rollback()
+            return False, f"Ошибка при присоединении: {str(e)}"
+    
+    @staticmethod
+    def lock_schedule(user_id):
+        """Блокировка расписания пользователя до конца транзакции.
+        
+        UPDATE строки users (отметка изменения участий для календарной ленты)
+        берет блокировку строки в PostgreSQL и блокировку записи в SQLite:
+        параллельное бронирование того же пользователя ждет commit и затем
+        видит новую запись, поэтому проверку пересечений нужно делать после
+        этого вызова в той же транзакции.
+        """
+        
+        mark_participation_changed([user_id])
+    
+    @staticmethod
+    def find_schedule_conflict(user_id, scheduled_time, duration=60):
+        """Ближайшая активная встреча или комната пользователя, пересекающаяся по времени.
+        
+        Встреча не длиннее MAX_MEETING_DURATION, поэтому пересечься могут только
+        начинающиеся в окне (начало - MAX_MEETING_DURATION, конец). Запрос идет
+        от этого окна по индексу scheduled_time, участие проверяется EXISTS по
+        уникальному индексу (user_id, meeting_id) - стоимость зависит от числа
+        встреч в окне, а не от истории пользователя. Точная проверка окончания - в Python.
+        """
+        
+        start = scheduled_time
+        end = start + timedelta(minutes=duration or 60)
+        window_start = start - timedelta(minutes=current_app.config['MAX_MEETING_DURATION'])
+        
+        candidates = []
+        for model, participant_model, fk_column in (
+            (Meeting, MeetingParticipant, MeetingParticipant.meeting_id),
+            (MeetingRoom, RoomParticipant, RoomParticipant.room_id),
+        ):
+            joined = exists().where(
+                participant_model.user_id == user_id,
+                fk_column == model.id
+            )
+            candidates.extend(model.query.filter(
+                model.scheduled_time > window_start,
+                model.scheduled_time < end,
+                model.is_active == True,
+                or_(model.moderator_id == user_id, joined)
+            ).all())
+        
+        conflicts = [
+            item for item in candidates
+            if item.scheduled_time + timedelta(minutes=item.duration or 60) > start
+        ]
+        if not conflicts:
+            return None
+        
+        return min(conflicts, key=lambda item: item.scheduled_time)
+    
+    @staticmethod
+    def conflict_message(conflict):
+        return (f"Время пересекается с вашей встречей «{conflict.title}» "
+                f"({conflict.scheduled_time.strftime('%d.%m.%Y %H:%M')})")
+    
     @staticmethod
     def get_upcoming_rooms(user_id=None, filters=None):
         """Получение предстоящих комнат"""
@@ -110,6 +234,11 @@ class MeetingService:
             ).subquery()
             query = query.filter(~MeetingRoom.id.in_(user_rooms))
         
+        if filters and filters.get('sort') == 'reputation':
+            query = query.outerjoin(
+                ModeratorReputation, ModeratorReputation.moderator_id == MeetingRoom.moderator_id
+            ).order_by(RatingService.bayesian_average_expr().desc())
+        
         query = query.order_by(MeetingRoom.scheduled_time.asc())
         return query.all()
     
@@ -128,6 +257,22 @@ class MeetingService:
         
         return rooms
     
+    @staticmethod
+    def get_user_room_participations(user_id):
+        """Пары (комната, участие) пользователя одним запросом - для оценок комнат"""
+        
+        return db.session.query(
+            MeetingRoom,
+            RoomParticipant
+        ).join(
+            RoomParticipant, RoomParticipant.room_id == MeetingRoom.id
+        ).filter(
+            RoomParticipant.user_id == user_id,
+            MeetingRoom.is_active == True
+        ).order_by(
+            MeetingRoom.scheduled_time.desc()
+        ).all()
+    
     @staticmethod
     def get_popular_topics():
         """Получение популярных тем"""
@@ -24,6 +24,8 @@ class User(UserMixin, db.Model):
     is_active = db.Column(db.Boolean, default=True)
     is_verified = db.Column(db.Boolean, default=False)
     verification_token = db.Column(db.String(100))
+    calendar_token = db.Column(db.String(64), unique=True, index=True)
+    participations_changed_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Связи - УБЕРИТЕ ИЛИ ИЗМЕНИТЕ КОНФЛИКТУЮЩИЕ backref
     meetings = db.relationship('MeetingParticipant', backref='participant_user', lazy=True)  # ИЗМЕНИТЕ backref
@@ -47,14 +49,20 @@ class Meeting(db.Model):
     language = db.Column(db.String(50), nullable=False)
     level = db.Column(db.String(20), nullable=False)
     max_participants = db.Column(db.Integer, default=6)
-    scheduled_time = db.Column(db.DateTime, nullable=False)
+    scheduled_time = db.Column(db.DateTime, nullable=False, index=True)
     duration = db.Column(db.Integer, default=60)
     moderator_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     telemost_link = db.Column(db.String(500), nullable=True)
     
-
+    is_archived = False
+    
+    # id переносятся в архив как есть - SQLite не должен выдавать их повторно
+    __table_args__ = (
+        db.Index('ix_meetings_moderator_time', 'moderator_id', 'scheduled_time'),
+        {'sqlite_autoincrement': True},
+    )
     
     participants = db.relationship('MeetingParticipant', backref='meeting_rel', lazy=True)  # ИЗМЕНИТЕ backref
 
@@ -67,7 +75,10 @@ class MeetingParticipant(db.Model):
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
     rating = db.Column(db.Integer)
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'meeting_id', name='unique_participation'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'meeting_id', name='unique_participation'),
+        {'sqlite_autoincrement': True},
+    )
     
     # Добавьте отношение user
     user = db.relationship('User', backref='user_meeting_participations')  # ИЗМЕНИТЕ backref
@@ -85,9 +96,16 @@ class MeetingRoom(db.Model):
     current_participants = db.Column(db.Integer, default=0)
     is_active = db.Column(db.Boolean, default=True)
     moderator_id = db.Column(db.Integer, db.ForeignKey('users.id'))
-    scheduled_time = db.Column(db.DateTime, nullable=False)
+    scheduled_time = db.Column(db.DateTime, nullable=False, index=True)
     duration = db.Column(db.Integer, default=60)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    is_archived = False
+    
+    __table_args__ = (
+        db.Index('ix_meeting_rooms_moderator_time', 'moderator_id', 'scheduled_time'),
+        {'sqlite_autoincrement': True},
+    )
 
 class RoomParticipant(db.Model):
     __tablename__ = 'room_participants'
@@ -99,7 +117,91 @@ class RoomParticipant(db.Model):
     left_at = db.Column(db.DateTime)
     rating = db.Column(db.Integer)
     
-    __table_args__ = (db.UniqueConstraint('user_id', 'room_id', name='unique_room_participant'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'room_id', name='unique_room_participant'),
+        {'sqlite_autoincrement': True},
+    )
     
     room = db.relationship('MeetingRoom', backref='room_participants_rel')
-    user = db.relationship('User', backref='user_room_participations')  # ИЗМЕНИТЕ backref
\ No newline at end of file
+    user = db.relationship('User', backref='user_room_participations')  # ИЗМЕНИТЕ backref
+
+# Агрегаты репутации - обновляются инкрементально вместе с каждой оценкой
+# (см. rating_service.py), пересчитываются командой `flask rebuild-reputation`
+
+class ModeratorReputation(db.Model):
+    __tablename__ = 'moderator_reputation'
+    
+    moderator_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+
+class TopicReputation(db.Model):
+    __tablename__ = 'topic_reputation'
+    
+    topic = db.Column(db.String(100), primary_key=True)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+
+# Архив завершенных встреч (см. archive_service.py).
+# Колонки повторяют горячие таблицы, id сохраняются при переносе.
+
+class ArchivedMeeting(db.Model):
+    __tablename__ = 'meetings_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    topic = db.Column(db.String(100), nullable=False)
+    language = db.Column(db.String(50), nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    max_participants = db.Column(db.Integer, default=6)
+    scheduled_time = db.Column(db.DateTime, nullable=False)
+    duration = db.Column(db.Integer, default=60)
+    moderator_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime)
+    telemost_link = db.Column(db.String(500), nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    is_archived = True
+    
+    participants = db.relationship('ArchivedMeetingParticipant', backref='archived_meeting', lazy=True)
+
+class ArchivedMeetingParticipant(db.Model):
+    __tablename__ = 'meeting_participants_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    meeting_id = db.Column(db.Integer, db.ForeignKey('meetings_archive.id'), nullable=False, index=True)
+    joined_at = db.Column(db.DateTime)
+    rating = db.Column(db.Integer)
+
+class ArchivedMeetingRoom(db.Model):
+    __tablename__ = 'meeting_rooms_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    topic = db.Column(db.String(100), nullable=False)
+    language = db.Column(db.String(50), nullable=False)
+    level = db.Column(db.String(20), nullable=False)
+    max_participants = db.Column(db.Integer, default=6)
+    current_participants = db.Column(db.Integer, default=0)
+    is_active = db.Column(db.Boolean, default=True)
+    moderator_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
+    scheduled_time = db.Column(db.DateTime, nullable=False)
+    duration = db.Column(db.Integer, default=60)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    is_archived = True
+
+class ArchivedRoomParticipant(db.Model):
+    __tablename__ = 'room_participants_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('meeting_rooms_archive.id'), nullable=False, index=True)
+    joined_at = db.Column(db.DateTime)
+    left_at = db.Column(db.DateTime)
+    rating = db.Column(db.Integer)
@@ -0,0 +1,24 @@
+import os
+
+# Колбэки, пересоздающие состояние процесса (пулы соединений, кэши, executors)
+# в каждом воркере после fork() из предзагруженного мастер-процесса.
+# Регистрируются один раз на уровне модуля; объекты конкретных приложений
+# колбэки держат через weakref, чтобы не продлевать им жизнь.
+_after_fork_callbacks = []
+
+
+def register_after_fork(callback):
+    if callback not in _after_fork_callbacks:
+        _after_fork_callbacks.append(callback)
+    return callback
+
+
+def reinit_after_fork():
+    for callback in _after_fork_callbacks:
+        callback()
+
+
+# gunicorn (preload_app) и multiprocessing форкают через os.fork();
+# для uWSGI тот же хук подключается в wsgi.py через uwsgidecorators.postfork
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reinit_after_fork)
@@ -0,0 +1,275 @@
+from collections import OrderedDict
+import math
+import threading
+import time
+import weakref
+from flask import current_app, request, jsonify, make_response
+from process_state import register_after_fork
+
+PERIODS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400,
+}
+
+# Хранилища всех приложений процесса - сбрасываются в воркере после fork
+_stores = weakref.WeakSet()
+
+
+@register_after_fork
+def _reset_stores():
+    for store in list(_stores):
+        store.reset()
+
+
+def parse_limit(value):
+    """'10/minute' -> (10, 60)"""
+    amount, _, period = value.partition('/')
+    period = period.strip().rstrip('s')
+    if period not in PERIODS:
+        raise ValueError(f'Неизвестный период лимита: {value!r}')
+    return int(amount), PERIODS[period]
+
+
+class MemoryStore:
+    """Token bucket в памяти процесса.
+
+    Ключи хранятся в OrderedDict в порядке последнего обращения: при
+    превышении max_keys вытесняется самый старый - O(1) на запрос и
+    ограниченная память при любом числе IP.
+    """
+
+    def __init__(self, max_keys=10000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, amount, period):
+        """Возвращает (разрешено, через сколько секунд повторить)"""
+        now = self.clock()
+        rate = amount / period
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                tokens = float(amount)
+            else:
+                tokens, updated_at = bucket
+                tokens = min(float(amount), tokens + (now - updated_at) * rate)
+                self._buckets.move_to_end(key)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0
+
+            self._buckets[key] = (tokens, now)
+            return False, math.ceil((1 - tokens) / rate)
+
+
+class SlidingWindowStore:
+    """Скользящее окно поверх общего хранилища счетчиков.
+
+    Клиенту нужны только incr/expire/mget (интерфейс redis.Redis), поэтому
+    лимиты разделяются между всеми воркерами. Оценка - взвешенная сумма
+    счетчиков текущего и предыдущего окна.
+    """
+
+    def __init__(self, client, prefix='rl:', clock=time.time):
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+
+    def reset(self):
+        # Состояние живет во внешнем хранилище - после fork сбрасывать нечего
+        pass
+
+    def consume(self, key, amount, period):
+        now = self.clock()
+        window = int(now // period)
+        elapsed = now - window * period
+
+        current_key = f'{self.prefix}{key}:{window}'
+        previous_key = f'{self.prefix}{key}:{window - 1}'
+
+        # Сначала атомарный incr, решение - по возвращенному значению:
+        # параллельные воркеры получают разные счетчики и не могут
+        # одновременно занять последний слот
+        current = self.client.incr(current_key, 1)
+        self.client.expire(current_key, period * 2)
+        previous = int(self.client.mget([previous_key])[0] or 0)
+
+        estimated = previous * (period - elapsed) / period + current
+        if estimated > amount:
+            # Отклоненный запрос не должен расходовать лимит
+            self.client.incr(current_key, -1)
+            return False, max(1, math.ceil(period - elapsed))
+
+        return True, 0
+
+
+class LocalCounterClient:
+    """Локальная замена общего хранилища (incr/expire/mget) для разработки и тестов"""
+
+    def __init__(self, max_keys=10000, clock=time.time):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _alive(self, key, now):
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= now:
+            del self._values[key]
+            return None
+        return item
+
+    def mget(self, keys):
+        now = self.clock()
+        with self._lock:
+            result = []
+            for key in keys:
+                item = self._alive(key, now)
+                result.append(None if item is None else item[0])
+            return result
+
+    def incr(self, key, amount=1):
+        now = self.clock()
+        with self._lock:
+            item = self._alive(key, now)
+            if item is None:
+                if len(self._values) >= self.max_keys:
+                    self._values.popitem(last=False)
+                item = (0, None)
+            value = item[0] + amount
+            self._values[key] = (value, item[1])
+            self._values.move_to_end(key)
+            return value
+
+    def expire(self, key, seconds):
+        now = self.clock()
+        with self._lock:
+            item = self._alive(key, now)
+            if item is None:
+                return False
+            self._values[key] = (item[0], now + seconds)
+            return True
+
+
+class RateLimiter:
+    """Ограничение частоты запросов по правилам из Config.RATE_LIMITS.
+
+    Проверка выполняется в before_request - до обращения к БД и bcrypt.
+    Хранилище и правила свои у каждого приложения (app.extensions).
+    """
+
+    def init_app(self, app, store=None):
+        if not app.config.get('RATE_LIMIT_ENABLED', True):
+            return
+
+        store = store or self._create_store(app.config)
+        app.extensions['rate_limit'] = {
+            'store': store,
+            'rules': {
+                endpoint: self._compile_rule(rule)
+                for endpoint, rule in app.config.get('RATE_LIMITS', {}).items()
+            },
+        }
+
+        _stores.add(store)
+        app.before_request(self.check_request)
+
+    @staticmethod
+    def _create_store(config):
+        storage = config.get('RATE_LIMIT_STORAGE', 'memory')
+        max_keys = config.get('RATE_LIMIT_MAX_KEYS', 10000)
+
+        if storage == 'memory':
+            return MemoryStore(max_keys=max_keys)
+        if storage == 'local':
+            return SlidingWindowStore(LocalCounterClient(max_keys=max_keys))
+        if storage == 'redis':
+            return SlidingWindowStore(RateLimiter._create_redis_client(config))
+        raise ValueError(f'Неизвестное хранилище лимитов: {storage!r}')
+
+    @staticmethod
+    def _create_redis_client(config):
+        """Общий для всех воркеров клиент incr/expire/mget по RATE_LIMIT_STORAGE_URL"""
+
+        url = config.get('RATE_LIMIT_STORAGE_URL')
+        if not url:
+            raise ValueError('Для хранилища лимитов redis нужен RATE_LIMIT_STORAGE_URL')
+
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('Для RATE_LIMIT_STORAGE=redis установите пакет redis') from None
+
+        # Пул соединений redis-py сам пересоздается в процессе после fork
+        return redis.Redis.from_url(url)
+
+    @staticmethod
+    def _compile_rule(rule):
+        methods = rule.get('methods')
+        return {
+            'methods': {method.upper() for method in methods} if methods else None,
+            'account_field': rule.get('account_field', 'username'),
+            'limits': [
+                (scope, parse_limit(rule[scope]))
+                for scope in ('ip', 'account') if rule.get(scope)
+            ],
+        }
+
+    def _scope_value(self, scope, rule):
+        if scope == 'ip':
+            return request.remote_addr or 'unknown'
+
+        value = (request.form.get(rule['account_field']) or '').strip().lower()
+        return value or None
+
+    def check_request(self):
+        state = current_app.extensions['rate_limit']
+        rule = state['rules'].get(request.endpoint)
+        if rule is None:
+            return None
+
+        if rule['methods'] and request.method not in rule['methods']:
+            return None
+
+        for scope, (amount, period) in rule['limits']:
+            value = self._scope_value(scope, rule)
+            if value is None:
+                continue
+
+            allowed, retry_after = state['store'].consume(
+                f'{request.endpoint}:{scope}:{value}', amount, period
+            )
+            if not allowed:
+                return self._reject(retry_after)
+
+        return None
+
+    @staticmethod
+    def _reject(retry_after):
+        message = 'Слишком много запросов. Попробуйте позже.'
+
+        if request.path.startswith('/api/'):
+            response = make_response(jsonify({'error': message}), 429)
+        else:
+            response = make_response(message, 429)
+            response.mimetype = 'text/plain'
+
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+
+limiter = RateLimiter()
@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from models import (db, Meeting, MeetingParticipant, MeetingRoom, RoomParticipant,
+                    ArchivedMeeting, ArchivedMeetingParticipant,
+                    ArchivedMeetingRoom, ArchivedRoomParticipant,
+                    ModeratorReputation, TopicReputation)
+
+MIN_RATING = 1
+MAX_RATING = 5
+
+# (встреча, участники, внешний ключ участника) - горячие и архивные таблицы
+RATED_SOURCES = (
+    (Meeting, MeetingParticipant, MeetingParticipant.meeting_id),
+    (MeetingRoom, RoomParticipant, RoomParticipant.room_id),
+    (ArchivedMeeting, ArchivedMeetingParticipant, ArchivedMeetingParticipant.meeting_id),
+    (ArchivedMeetingRoom, ArchivedRoomParticipant, ArchivedRoomParticipant.room_id),
+)
+
+
+def _bump(model, key_name, key, delta_count, delta_sum):
+    """Инкрементальное обновление агрегата в текущей транзакции (UPDATE, иначе INSERT)"""
+
+    key_column = getattr(model, key_name)
+    values = {
+        model.rating_count: model.rating_count + delta_count,
+        model.rating_sum: model.rating_sum + delta_sum,
+    }
+
+    if db.session.query(model).filter(key_column == key).update(values, synchronize_session=False):
+        return
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(model(**{key_name: key}, rating_count=delta_count, rating_sum=delta_sum))
+    except IntegrityError:
+        # Строку успел создать параллельный запрос
+        db.session.query(model).filter(key_column == key).update(values, synchronize_session=False)
+
+
+class RatingService:
+
+    @staticmethod
+    def bayesian_average(rating_count, rating_sum):
+        weight = current_app.config['REPUTATION_PRIOR_WEIGHT']
+        mean = current_app.config['REPUTATION_PRIOR_MEAN']
+        return ((rating_sum or 0) + weight * mean) / ((rating_count or 0) + weight)
+
+    @staticmethod
+    def bayesian_average_expr(model=ModeratorReputation):
+        """SQL-выражение байесовского среднего для ORDER BY (работает и с outer join)"""
+
+        weight = current_app.config['REPUTATION_PRIOR_WEIGHT']
+        mean = current_app.config['REPUTATION_PRIOR_MEAN']
+        return (func.coalesce(model.rating_sum, 0) + weight * mean) * 1.0 \
+            / (func.coalesce(model.rating_count, 0) + weight)
+
+    @staticmethod
+    def get_moderator_reputation(moderator_id):
+        """(средняя оценка, число оценок) модератора"""
+
+        reputation = ModeratorReputation.query.get(moderator_id) if moderator_id else None
+        if not reputation or not reputation.rating_count:
+            return None, 0
+
+        return (RatingService.bayesian_average(reputation.rating_count, reputation.rating_sum),
+                reputation.rating_count)
+
+    @staticmethod
+    def can_rate(user_id, meeting, participant):
+        if participant is None:
+            return False, "Оценить встречу могут только ее участники"
+
+        if meeting.moderator_id == user_id:
+            return False, "Модератор не может оценивать собственную встречу"
+
+        if not meeting.is_active:
+            return False, "Встреча была отменена"
+
+        if meeting.scheduled_time + timedelta(minutes=meeting.duration or 60) > datetime.utcnow():
+            return False, "Оценить встречу можно только после ее окончания"
+
+        return True, ""
+
+    @staticmethod
+    def rate_meeting(user_id, meeting_id, rating):
+        """Оценка встречи участником"""
+
+        meeting = Meeting.query.get(meeting_id)
+        if not meeting:
+            return False, "Встреча не найдена"
+
+        participant = MeetingParticipant.query.filter_by(
+            user_id=user_id,
+            meeting_id=meeting_id
+        ).first()
+
+        return RatingService._save_rating(user_id, meeting, participant, rating)
+
+    @staticmethod
+    def rate_room(user_id, room_id, rating):
+        """Оценка тематической комнаты участником"""
+
+        room = MeetingRoom.query.get(room_id)
+        if not room:
+            return False, "Комната не найдена"
+
+        participant = RoomParticipant.query.filter_by(
+            user_id=user_id,
+            room_id=room_id
+        ).first()
+
+        return RatingService._save_rating(user_id, room, participant, rating)
+
+    @staticmethod
+    def _save_rating(user_id, meeting, participant, rating):
+        try:
+            rating = int(rating)
+        except (TypeError, ValueError):
+            return False, "Оценка должна быть числом"
+
+        if rating < MIN_RATING or rating > MAX_RATING:
+            return False, f"Оценка должна быть от {MIN_RATING} до {MAX_RATING}"
+
+        allowed, message = RatingService.can_rate(user_id, meeting, participant)
+        if not allowed:
+            return False, message
+
+        try:
+            delta_count, delta_sum = RatingService._store_participant_rating(participant, rating)
+            if meeting.moderator_id:
+                _bump(ModeratorReputation, 'moderator_id', meeting.moderator_id, delta_count, delta_sum)
+            _bump(TopicReputation, 'topic', meeting.topic, delta_count, delta_sum)
+
+            db.session.commit()
+            return True, "Спасибо за оценку!"
+        except Exception as e:
+            db.session.rollback()
+            return False, f"Ошибка при сохранении оценки: {str(e)}"
+
+    @staticmethod
+    def _store_participant_rating(participant, rating):
+        """Запись оценки участника и изменение агрегатов (число, сумма).
+
+        participant.rating мог устареть (двойной клик, параллельный запрос),
+        поэтому первая оценка определяется условным UPDATE ... WHERE rating
+        IS NULL: засчитать ее может только один запрос. Повторная оценка
+        читает прежнюю под блокировкой строки.
+        """
+
+        model = type(participant)
+        rows = db.session.query(model).filter(model.id == participant.id)
+
+        if rows.filter(model.rating.is_(None)).update({model.rating: rating}, synchronize_session=False):
+            delta_count, delta_sum = 1, rating
+        else:
+            previous = rows.with_entities(model.rating).with_for_update().scalar()
+            rows.update({model.rating: rating}, synchronize_session=False)
+            delta_count, delta_sum = 0, rating - previous
+
+        db.session.expire(participant, ['rating'])
+        return delta_count, delta_sum
+
+    @staticmethod
+    def rebuild_reputation(dry_run=False):
+        """Полный пересчет агрегатов по участникам (включая архив).
+
+        Возвращает число расходившихся строк для каждой таблицы агрегатов.
+        """
+
+        expected = {ModeratorReputation: {}, TopicReputation: {}}
+
+        for model, participant_model, fk_column in RATED_SOURCES:
+            for aggregate, key_column in ((ModeratorReputation, model.moderator_id),
+                                          (TopicReputation, model.topic)):
+                rows = db.session.query(
+                    key_column,
+                    func.count(participant_model.rating),
+                    func.sum(participant_model.rating)
+                ).join(
+                    model, model.id == fk_column
+                ).filter(
+                    participant_model.rating.isnot(None),
+                    key_column.isnot(None)
+                ).group_by(key_column).all()
+
+                for key, count, total in rows:
+                    current_count, current_sum = expected[aggregate].get(key, (0, 0))
+                    expected[aggregate][key] = (current_count + count, current_sum + (total or 0))
+
+        mismatches = {}
+        for aggregate, key_name in ((ModeratorReputation, 'moderator_id'), (TopicReputation, 'topic')):
+            actual = {
+                getattr(row, key_name): (row.rating_count, row.rating_sum)
+                for row in aggregate.query.all()
+            }
+            keys = set(actual) | set(expected[aggregate])
+            mismatches[aggregate.__tablename__] = sum(
+                1 for key in keys
+                if actual.get(key, (0, 0)) != expected[aggregate].get(key, (0, 0))
+            )
+
+            if dry_run:
+                continue
+
+            aggregate.query.delete()
+            db.session.add_all(
+                aggregate(**{key_name: key}, rating_count=count, rating_sum=total)
+                for key, (count, total) in expected[aggregate].items()
+            )
+
+        if not dry_run:
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        return mismatches
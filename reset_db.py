@@ -1,7 +1,9 @@
-from app import app, db
-import models  # Импортируем модели
+from app import create_app
+from models import db
+
+app = create_app()
 
 with app.app_context():
     db.drop_all()      # Удалить все таблицы
     db.create_all()    # Создать заново с новыми полями
-    print("✅ База данных пересоздана с полем telemost_link!")
\ No newline at end of file
+    print("✅ База данных пересоздана!")
@@ -0,0 +1,14 @@
+from importlib import import_module
+
+# Блюпринты импортируются только внутри create_app(), а не при импорте пакета
+BLUEPRINTS = (
+    'routes.main',
+    'routes.accounts',
+    'routes.meetings',
+    'routes.api',
+)
+
+
+def register_blueprints(app):
+    for module_name in BLUEPRINTS:
+        app.register_blueprint(import_module(module_name).bp)
@@ -0,0 +1,67 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_user, login_required, logout_user, current_user
+from auth import AuthService
+
+bp = Blueprint('accounts', __name__)
+
+# Маршруты аутентификации
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+
+    if request.method == 'POST':
+        username = request.form.get('username')
+        password = request.form.get('password')
+        remember = request.form.get('remember') == 'on'
+
+        user, message = AuthService.authenticate_user(username, password)
+
+        if user:
+            login_user(user, remember=remember)
+            next_page = request.args.get('next')
+            flash('Вход выполнен успешно!', 'success')
+            return redirect(next_page or url_for('main.dashboard'))
+        else:
+            flash(message, 'danger')
+
+    return render_template('login.html')
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+
+    if request.method == 'POST':
+        form_data = {
+            'username': request.form.get('username'),
+            'email': request.form.get('email'),
+            'password': request.form.get('password'),
+            'first_name': request.form.get('first_name'),
+            'last_name': request.form.get('last_name'),
+            'age': request.form.get('age'),
+            'country': request.form.get('country'),
+            'native_language': request.form.get('native_language'),
+            'learning_languages': request.form.getlist('learning_languages'),
+            'interests': request.form.get('interests')
+        }
+
+        success, message = AuthService.register_user(form_data)
+
+        if success:
+            flash(message, 'success')
+            return redirect(url_for('accounts.login'))
+        else:
+            flash(message, 'danger')
+
+    countries = ['Россия', 'США', 'Великобритания', 'Германия', 'Франция', 'Испания', 'Китай', 'Япония', 'Корея', 'Бразилия']
+    languages = ['Английский', 'Испанский', 'Французский', 'Немецкий', 'Китайский', 'Японский', 'Корейский', 'Русский', 'Португальский', 'Итальянский']
+
+    return render_template('register.html', countries=countries, languages=languages)
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    flash('Вы вышли из системы', 'info')
+    return redirect(url_for('main.index'))
@@ -0,0 +1,67 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+from models import User, MeetingRoom, ModeratorReputation
+from rating_service import RatingService
+from auth import AuthValidator
+from datetime import datetime
+
+bp = Blueprint('api', __name__)
+
+# API эндпоинты
+@bp.route('/api/check-username')
+def check_username():
+    username = request.args.get('username', '')
+    exists = User.query.filter_by(username=username).first() is not None
+    return jsonify({'available': not exists})
+
+@bp.route('/api/check-email')
+def check_email():
+    email = request.args.get('email', '')
+    exists = User.query.filter_by(email=email).first() is not None
+    
+    is_valid = AuthValidator.validate_email(email)
+    
+    return jsonify({
+        'available': not exists,
+        'valid': is_valid
+    })
+
+@bp.route('/api/meetings')
+@login_required
+def get_meetings():
+    topic = request.args.get('topic')
+    language = request.args.get('language')
+    level = request.args.get('level')
+    sort = request.args.get('sort')
+    
+    query = MeetingRoom.query.filter(
+        MeetingRoom.scheduled_time > datetime.utcnow(),
+        MeetingRoom.is_active == True
+    )
+    
+    if topic:
+        query = query.filter(MeetingRoom.topic.contains(topic))
+    if language:
+        query = query.filter(MeetingRoom.language == language)
+    if level:
+        query = query.filter(MeetingRoom.level == level)
+    if sort == 'reputation':
+        query = query.outerjoin(ModeratorReputation, ModeratorReputation.moderator_id == MeetingRoom.moderator_id)\
+            .order_by(RatingService.bayesian_average_expr().desc(), MeetingRoom.scheduled_time.asc())
+    
+    meetings = query.limit(20).all()
+    
+    result = []
+    for meeting in meetings:
+        result.append({
+            'id': meeting.id,
+            'title': meeting.title,
+            'topic': meeting.topic,
+            'language': meeting.language,
+            'level': meeting.level,
+            'scheduled_time': meeting.scheduled_time.isoformat(),
+            'participant_count': meeting.current_participants,
+            'max_participants': meeting.max_participants
+        })
+    
+    return jsonify(result)
@@ -0,0 +1,72 @@
+from flask import Blueprint, render_template, request, flash
+from flask_login import login_required, current_user
+from models import db
+from archive_service import ArchiveService
+from datetime import datetime
+
+bp = Blueprint('main', __name__)
+
+@bp.route('/')
+def index():
+    return render_template('index.html')
+
+# Личный кабинет
+@bp.route('/dashboard')
+@login_required
+def dashboard():
+    # Старая статистика
+    total_meetings = ArchiveService.count_user_meetings(current_user.id)
+    total_friends = 0
+    total_languages = len(current_user.learning_languages.split(',')) if current_user.learning_languages else 0
+    total_hours = total_meetings * 1
+
+    user_data = {
+        'username': current_user.username,
+        'name': f"{current_user.first_name} {current_user.last_name}",
+        'age': current_user.age,
+        'country': current_user.country,
+        'native_language': current_user.native_language,
+        'learning_languages': current_user.learning_languages.split(',') if current_user.learning_languages else [],
+        'stats': {
+            'total_meetings': total_meetings,
+            'total_friends': total_friends,
+            'total_languages': total_languages,
+            'total_hours': total_hours
+        }
+    }
+
+    # Текущая дата на русском
+    months_ru = ['января', 'февраля', 'марта', 'апреля', 'мая', 'июня',
+                 'июля', 'августа', 'сентября', 'октября', 'ноября', 'декабря']
+
+    now = datetime.now()
+    current_date = f"{now.day} {months_ru[now.month-1]} {now.year}"
+
+    return render_template('dashboard.html',
+                         user=user_data,
+                         current_date=current_date)
+
+@bp.route('/profile', methods=['GET', 'POST'])
+@login_required
+def profile():
+    if request.method == 'POST':
+        current_user.first_name = request.form.get('first_name', current_user.first_name)
+        current_user.last_name = request.form.get('last_name', current_user.last_name)
+        current_user.country = request.form.get('country', current_user.country)
+        current_user.interests = request.form.get('interests', current_user.interests)
+
+        new_languages = request.form.getlist('learning_languages')
+        current_user.learning_languages = ','.join(new_languages)
+
+        try:
+            db.session.commit()
+            flash('Профиль успешно обновлен!', 'success')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Ошибка при обновлении профиля: {str(e)}', 'danger')
+
+    learning_languages_list = current_user.learning_languages.split(',') if current_user.learning_languages else []
+
+    return render_template('profile.html',
+                         user=current_user,
+                         learning_languages_list=learning_languages_list)
@@ -0,0 +1,332 @@
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, flash, abort, Response, stream_with_context
+from flask_login import login_required, current_user
+from models import db, Meeting, MeetingParticipant, ModeratorReputation
+from meeting_service import MeetingService
+from calendar_feed import CalendarFeedService, mark_participation_changed
+from archive_service import ArchiveService
+from rating_service import RatingService
+from datetime import datetime
+
+bp = Blueprint('meetings', __name__)
+
+# Система встреч
+@bp.route('/create_meeting', methods=['GET', 'POST'])
+@login_required
+def create_meeting():
+    if request.method == 'POST':
+        title = request.form.get('title')
+        description = request.form.get('description')
+        topic = request.form.get('topic')
+        language = request.form.get('language')
+        level = request.form.get('level')
+        scheduled_time_str = request.form.get('scheduled_time')
+        max_participants = request.form.get('max_participants', 6)
+        telemost_link = request.form.get('telemost_link', '').strip()
+        
+        if not all([title, topic, language, level, scheduled_time_str]):
+            flash('Заполните все обязательные поля', 'danger')
+            return render_template('create_meeting.html')
+        
+        try:
+            from datetime import datetime
+            scheduled_time = datetime.strptime(scheduled_time_str, '%Y-%m-%dT%H:%M')
+            
+            # Проверка и запись в одной транзакции под блокировкой расписания
+            MeetingService.lock_schedule(current_user.id)
+            conflict = MeetingService.find_schedule_conflict(current_user.id, scheduled_time)
+            if conflict:
+                db.session.rollback()
+                flash(MeetingService.conflict_message(conflict), 'danger')
+                conflict_url = url_for('meetings.meeting_detail', meeting_id=conflict.id) \
+                    if isinstance(conflict, Meeting) else None
+                return render_template('create_meeting.html', conflict=conflict, conflict_url=conflict_url)
+            
+            meeting = Meeting(
+                title=title,
+                description=description,
+                topic=topic,
+                language=language,
+                level=level,
+                moderator_id=current_user.id,
+                scheduled_time=scheduled_time,
+                max_participants=int(max_participants),
+                is_active=True,
+                telemost_link=telemost_link if telemost_link else None,
+            )
+            
+            db.session.add(meeting)
+            db.session.flush()
+            
+            # Добавляем создателя как участника
+            participant = MeetingParticipant(
+                user_id=current_user.id,
+                meeting_id=meeting.id
+            )
+            db.session.add(participant)
+            db.session.commit()
+
+            flash('Встреча успешно создана!', 'success')
+            return redirect(url_for('meetings.meeting_detail', meeting_id=meeting.id))
+            
+        except ValueError as e:
+            flash(f'Ошибка в формате даты: {str(e)}', 'danger')
+            return render_template('create_meeting.html')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Ошибка при создании встречи: {str(e)}', 'danger')
+            return render_template('create_meeting.html')
+    
+    return render_template('create_meeting.html')
+
+@bp.route('/meetings/<int:meeting_id>/cancel', methods=['GET', 'POST'])
+@login_required
+def cancel_meeting(meeting_id):
+    """Отмена встречи (только для модератора)"""
+    meeting = Meeting.query.get_or_404(meeting_id)
+    
+    # Проверка прав: только создатель встречи может отменить
+    if meeting.moderator_id != current_user.id:
+        flash('Только создатель встречи может ее отменить', 'danger')
+        return redirect(url_for('meetings.meeting_detail', meeting_id=meeting_id))
+    
+    try:
+        # Отмечаем встречу как неактивную вместо удаления
+        meeting.is_active = False
+        meeting.cancelled_at = datetime.utcnow()
+        
+        participant_ids = [p.user_id for p in meeting.participants]
+        mark_participation_changed(participant_ids + [meeting.moderator_id])
+        
+        db.session.commit()
+        flash('Встреча успешно отменена', 'success')
+        
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Ошибка при отмене встречи: {str(e)}', 'danger')
+    
+    return redirect(url_for('meetings.my_meetings'))
+
+@bp.route('/meeting_room/<int:meeting_id>')
+@login_required
+def meeting_room(meeting_id):
+    """Страница видеовстречи (заглушка)"""
+    meeting = Meeting.query.get_or_404(meeting_id)
+    
+    # Получаем участников встречи
+    participants = MeetingParticipant.query.filter_by(meeting_id=meeting_id).all()
+    
+    # Проверяем, является ли пользователь участником или модератором
+    is_participant = any(p.user_id == current_user.id for p in participants)
+    is_moderator = meeting.moderator_id == current_user.id
+    
+    if not (is_participant or is_moderator):
+        flash('Вы не являетесь участником этой встречи', 'danger')
+        return redirect(url_for('meetings.meetings_list'))
+    
+    return render_template('meeting_room.html', 
+                         meeting=meeting,
+                         participants=participants)
+    
+@bp.route('/meetings')
+@login_required
+def meetings_list():
+    # Получаем фильтры из URL
+    filters = {
+        'topic': request.args.get('topic'),
+        'language': request.args.get('language'),
+        'level': request.args.get('level'),
+        'sort': request.args.get('sort')
+    }
+    
+    # Базовый запрос для всех активных встреч
+    query = Meeting.query.filter_by(is_active=True)
+    
+    # Применяем фильтры
+    if filters['topic']:
+        query = query.filter(Meeting.topic.ilike(f"%{filters['topic']}%"))
+    
+    if filters['language']:
+        query = query.filter_by(language=filters['language'])
+    
+    if filters['level']:
+        query = query.filter_by(level=filters['level'])
+    
+    if filters['sort'] == 'reputation':
+        # Готовый агрегат вместо AVG по участникам на каждый запрос
+        query = query.outerjoin(ModeratorReputation, ModeratorReputation.moderator_id == Meeting.moderator_id)\
+            .order_by(RatingService.bayesian_average_expr().desc())
+    
+    # Сортируем по дате (ближайшие первые)
+    upcoming_meetings = query.order_by(Meeting.scheduled_time.asc()).all()
+    
+    # Участие и число участников - одним запросом на страницу, а не по карточке
+    meeting_ids = [meeting.id for meeting in upcoming_meetings]
+    joined_ids = {
+        meeting_id for meeting_id, in db.session.query(MeetingParticipant.meeting_id).filter(
+            MeetingParticipant.user_id == current_user.id,
+            MeetingParticipant.meeting_id.in_(meeting_ids)
+        )
+    } if meeting_ids else set()
+    
+    # Получаем популярные темы (если функция есть)
+    try:
+        popular_topics = MeetingService.get_popular_topics()
+    except:
+        # Если MeetingService не существует, получаем популярные темы напрямую
+        popular_topics = db.session.query(
+            Meeting.topic,
+            db.func.count(Meeting.id).label('count')
+        ).group_by(Meeting.topic)\
+         .order_by(db.desc('count'))\
+         .limit(10)\
+         .all()
+        popular_topics = [topic for topic, count in popular_topics]
+    
+    return render_template('meetings.html',
+                         meetings=upcoming_meetings,
+                         joined_ids=joined_ids,
+                         participant_counts=ArchiveService.count_participants(upcoming_meetings),
+                         popular_topics=popular_topics,
+                         filters=filters,
+                         current_time=datetime.utcnow())
+
+@bp.route('/meeting/<int:meeting_id>')
+@login_required
+def meeting_detail(meeting_id):
+    meeting = Meeting.query.get_or_404(meeting_id)
+    
+    participant = MeetingParticipant.query.filter_by(
+        user_id=current_user.id,
+        meeting_id=meeting_id
+    ).first()
+    can_rate, _ = RatingService.can_rate(current_user.id, meeting, participant)
+    can_join = participant is None \
+        and meeting.moderator_id != current_user.id \
+        and meeting.is_active \
+        and meeting.scheduled_time > datetime.utcnow() \
+        and len(meeting.participants) < (meeting.max_participants or 6)
+    moderator_rating, moderator_rating_count = RatingService.get_moderator_reputation(meeting.moderator_id)
+    
+    return render_template('meeting_detail.html',
+                         meeting=meeting,
+                         can_rate=can_rate,
+                         can_join=can_join,
+                         my_rating=participant.rating if participant else None,
+                         moderator_rating=moderator_rating,
+                         moderator_rating_count=moderator_rating_count)
+
+@bp.route('/meeting/<int:meeting_id>/rate', methods=['POST'])
+@login_required
+def rate_meeting(meeting_id):
+    success, message = RatingService.rate_meeting(current_user.id, meeting_id, request.form.get('rating'))
+    flash(message, 'success' if success else 'danger')
+    return redirect(url_for('meetings.meeting_detail', meeting_id=meeting_id))
+
+@bp.route('/rooms/<int:room_id>/rate', methods=['POST'])
+@login_required
+def rate_room(room_id):
+    success, message = RatingService.rate_room(current_user.id, room_id, request.form.get('rating'))
+    flash(message, 'success' if success else 'danger')
+    return redirect(url_for('meetings.my_meetings'))
+
+@bp.route('/meetings/<int:meeting_id>/join', methods=['POST'])
+@login_required
+def join_meeting(meeting_id):
+    success, message = MeetingService.join_meeting(current_user.id, meeting_id)
+    
+    if success:
+        flash('Вы успешно присоединились к встрече!', 'success')
+    else:
+        flash(message, 'danger')
+    
+    return redirect(url_for('meetings.meeting_detail', meeting_id=meeting_id))
+
+@bp.route('/rooms/<int:room_id>/join', methods=['POST'])
+@login_required
+def join_room(room_id):
+    success, message = MeetingService.join_room(current_user.id, room_id)
+    
+    if success:
+        flash('Вы успешно присоединились к встрече!', 'success')
+    else:
+        flash(message, 'danger')
+    
+    return redirect(url_for('meetings.meetings_list'))
+
+@bp.route('/my_meetings')
+@login_required
+def my_meetings():
+    # Получаем встречи, где пользователь является участником
+    # Через таблицу MeetingParticipant
+    participant_meetings = Meeting.query\
+        .join(MeetingParticipant, Meeting.id == MeetingParticipant.meeting_id)\
+        .filter(MeetingParticipant.user_id == current_user.id)\
+        .order_by(Meeting.scheduled_time.asc())\
+        .all()
+    
+    # Получаем встречи, где пользователь модератор
+    moderated_meetings = Meeting.query\
+        .filter(Meeting.moderator_id == current_user.id)\
+        .order_by(Meeting.scheduled_time.asc())\
+        .all()
+    
+    # Объединяем и убираем дубликаты
+    all_meetings = participant_meetings + moderated_meetings
+    unique_meetings = []
+    seen_ids = set()
+    
+    for meeting in all_meetings:
+        if meeting.id not in seen_ids:
+            seen_ids.add(meeting.id)
+            unique_meetings.append(meeting)
+    
+    # Прошедшие встречи, перенесенные в архив - постранично, архив только растет
+    archive_page = max(request.args.get('archive_page', 1, type=int), 1)
+    per_page = current_app.config['ARCHIVE_PAGE_SIZE']
+    archived = ArchiveService.get_user_archived_meetings(
+        current_user.id,
+        limit=per_page + 1,
+        offset=(archive_page - 1) * per_page
+    )
+    has_more_archive = len(archived) > per_page
+    unique_meetings.extend(archived[:per_page])
+    
+    rooms = [
+        (room, participant, RatingService.can_rate(current_user.id, room, participant)[0])
+        for room, participant in MeetingService.get_user_room_participations(current_user.id)
+    ]
+    
+    calendar_token = CalendarFeedService.get_or_create_token(current_user)
+    
+    return render_template('my_meetings.html', 
+                         meetings=unique_meetings,
+                         rooms=rooms,
+                         participant_counts=ArchiveService.count_participants(unique_meetings),
+                         archive_page=archive_page,
+                         has_more_archive=has_more_archive,
+                         calendar_url=url_for('meetings.calendar_feed', token=calendar_token, _external=True),
+                         current_time=datetime.utcnow())
+
+# Календарная подписка (.ics) по секретному токену, без входа в систему
+@bp.route('/calendar/<token>.ics')
+def calendar_feed(token):
+    owner = CalendarFeedService.find_feed_owner(token)
+    if owner is None:
+        abort(404)
+    
+    etag = CalendarFeedService.compute_etag(owner)
+    
+    # Календарные клиенты опрашивают ленту каждые несколько минут -
+    # при неизменном ETag отвечаем 304 без выборки встреч
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(
+            stream_with_context(CalendarFeedService.iter_feed(owner.id)),
+            mimetype='text/calendar'
+        )
+        response.headers['Content-Disposition'] = 'inline; filename="culturabridge.ics"'
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
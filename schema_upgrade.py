@@ -0,0 +1,127 @@
+from sqlalchemy import inspect, text, func, select
+from sqlalchemy.schema import CreateColumn, CreateTable
+from models import (db, Meeting, MeetingParticipant, MeetingRoom, RoomParticipant,
+                    ArchivedMeeting, ArchivedMeetingParticipant,
+                    ArchivedMeetingRoom, ArchivedRoomParticipant)
+
+# (горячая таблица, архивная таблица, [(дочерняя таблица, внешний ключ)])
+# id горячих таблиц переносятся в архив как есть и не должны выдаваться повторно
+HOT_TABLES = (
+    (Meeting.__table__, ArchivedMeeting.__table__,
+     [(MeetingParticipant.__table__, 'meeting_id')]),
+    (MeetingParticipant.__table__, ArchivedMeetingParticipant.__table__, []),
+    (MeetingRoom.__table__, ArchivedMeetingRoom.__table__,
+     [(RoomParticipant.__table__, 'room_id')]),
+    (RoomParticipant.__table__, ArchivedRoomParticipant.__table__, []),
+)
+
+
+def _add_missing_columns(conn, steps):
+    inspector = inspect(conn)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            spec = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {spec}'))
+            steps.append(f'{table.name}: добавлена колонка {column.name}')
+
+
+def _rebuild_with_autoincrement(conn, table, steps):
+    """Пересоздание таблицы SQLite с AUTOINCREMENT (CREATE new / INSERT / DROP / RENAME)"""
+
+    sql = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': table.name}
+    ).scalar()
+    if sql is None or 'AUTOINCREMENT' in sql.upper():
+        return
+
+    new_name = f'{table.name}__rebuild'
+    ddl = str(CreateTable(table).compile(dialect=conn.dialect))
+    ddl = ddl.replace(f'CREATE TABLE {table.name} ', f'CREATE TABLE {new_name} ', 1)
+    columns = ', '.join(column.name for column in table.columns)
+
+    conn.execute(text(ddl))
+    conn.execute(text(f'INSERT INTO {new_name} ({columns}) SELECT {columns} FROM {table.name}'))
+    conn.execute(text(f'DROP TABLE {table.name}'))
+    conn.execute(text(f'ALTER TABLE {new_name} RENAME TO {table.name}'))
+    steps.append(f'{table.name}: пересоздана с AUTOINCREMENT')
+
+
+def _max_id(conn, table):
+    return conn.execute(select(func.max(table.c.id))).scalar() or 0
+
+
+def _renumber_collisions(conn, table, archive_table, children, steps):
+    """Строки, получившие id уже перенесенной в архив строки, получают новый id"""
+
+    archived_ids = select(archive_table.c.id)
+    clashes = [row[0] for row in conn.execute(
+        select(table.c.id).where(table.c.id.in_(archived_ids)).order_by(table.c.id)
+    )]
+    if not clashes:
+        return
+
+    next_id = max(_max_id(conn, table), _max_id(conn, archive_table)) + 1
+    for old_id in clashes:
+        conn.execute(table.update().where(table.c.id == old_id).values(id=next_id))
+        for child, fk_name in children:
+            conn.execute(child.update().where(child.c[fk_name] == old_id).values({fk_name: next_id}))
+        steps.append(f'{table.name}: id {old_id} совпадал с архивным, присвоен {next_id}')
+        next_id += 1
+
+
+def _seed_sequence(conn, table, archive_table):
+    """sqlite_sequence не ниже максимального id горячей и архивной таблиц"""
+
+    max_id = max(_max_id(conn, table), _max_id(conn, archive_table))
+    if not max_id:
+        return
+
+    updated = conn.execute(
+        text('UPDATE sqlite_sequence SET seq = MAX(seq, :seq) WHERE name = :name'),
+        {'seq': max_id, 'name': table.name}
+    ).rowcount
+    if not updated:
+        conn.execute(
+            text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'),
+            {'seq': max_id, 'name': table.name}
+        )
+
+
+def upgrade_schema():
+    """Приведение существующей БД к текущим моделям.
+
+    create_all() создает только недостающие таблицы, поэтому здесь же
+    добавляются новые колонки и индексы, а в SQLite горячие таблицы
+    пересоздаются с AUTOINCREMENT - иначе id, перенесенные в архив,
+    выдаются повторно. Возвращает список выполненных шагов.
+    """
+
+    steps = []
+    db.create_all()
+
+    with db.engine.connect() as conn:
+        is_sqlite = conn.dialect.name == 'sqlite'
+        if is_sqlite:
+            # DROP TABLE при пересоздании не должен затрагивать ссылки из других таблиц
+            conn.execute(text('PRAGMA foreign_keys = OFF'))
+            conn.commit()
+
+        with conn.begin():
+            _add_missing_columns(conn, steps)
+
+            for table, archive_table, children in HOT_TABLES:
+                if is_sqlite:
+                    _rebuild_with_autoincrement(conn, table, steps)
+                _renumber_collisions(conn, table, archive_table, children, steps)
+                if is_sqlite:
+                    _seed_sequence(conn, table, archive_table)
+
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+
+    return steps
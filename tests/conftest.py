@@ -0,0 +1,46 @@
+import pytest
+from app import create_app
+from config import Config
+from models import db, User
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        RATE_LIMIT_ENABLED = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    def make_user(username, password='Passw0rd1', age=17):
+        user = User(
+            username=username,
+            email=f'{username}@example.com',
+            first_name='Имя',
+            last_name='Фамилия',
+            age=age,
+            country='Россия',
+            native_language='Русский'
+        )
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
+
+
+def login(client, username, password='Passw0rd1'):
+    return client.post('/login', data={'username': username, 'password': password})
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import text
+from archive_service import ArchiveService, ArchiveIdCollisionError
+from schema_upgrade import upgrade_schema
+from models import db, Meeting, MeetingParticipant, ArchivedMeeting, ArchivedMeetingParticipant
+
+
+def add_meeting(user, scheduled_time, duration=60, title='Встреча'):
+    meeting = Meeting(title=title, topic='Кино', language='Английский', level='B1',
+                      moderator_id=user.id, scheduled_time=scheduled_time, duration=duration)
+    db.session.add(meeting)
+    db.session.flush()
+    db.session.add(MeetingParticipant(user_id=user.id, meeting_id=meeting.id))
+    db.session.commit()
+    return meeting.id
+
+
+def test_long_unfinished_meeting_does_not_stop_the_run(app, make_user):
+    user = make_user('alice')
+    cutoff = datetime.utcnow() - timedelta(days=30)
+
+    # Началась раньше всех, но закончится уже после границы
+    long_id = add_meeting(user, cutoff - timedelta(hours=1), duration=240, title='Длинная')
+    finished_ids = [
+        add_meeting(user, cutoff - timedelta(minutes=50 - i), duration=10)
+        for i in range(5)
+    ]
+
+    stats = ArchiveService.archive_finished(days=30, batch_size=2)
+
+    assert stats['meetings'] == 5
+    assert stats['meeting_participants'] == 5
+    assert [m.id for m in Meeting.query.all()] == [long_id]
+    assert sorted(m.id for m in ArchivedMeeting.query.all()) == finished_ids
+    assert ArchiveService.count_user_meetings(user.id) == 6
+
+
+def test_rerun_is_a_no_op(app, make_user):
+    user = make_user('alice')
+    add_meeting(user, datetime.utcnow() - timedelta(days=60))
+
+    assert ArchiveService.archive_finished(days=30)['meetings'] == 1
+    assert ArchiveService.archive_finished(days=30)['meetings'] == 0
+    assert ArchivedMeetingParticipant.query.count() == 1
+
+
+def make_legacy_meetings_table():
+    """Таблица meetings в виде, созданном до появления AUTOINCREMENT"""
+    db.session.execute(text('DROP TABLE meetings'))
+    db.session.execute(text(
+        'CREATE TABLE meetings (id INTEGER NOT NULL PRIMARY KEY, title VARCHAR(200) NOT NULL, '
+        'description TEXT, topic VARCHAR(100) NOT NULL, language VARCHAR(50) NOT NULL, '
+        'level VARCHAR(20) NOT NULL, max_participants INTEGER, scheduled_time DATETIME NOT NULL, '
+        'duration INTEGER, moderator_id INTEGER REFERENCES users (id), is_active BOOLEAN, '
+        'created_at DATETIME)'
+    ))
+    db.session.commit()
+
+
+def test_legacy_schema_id_reuse_is_detected_and_repaired(app, make_user):
+    user = make_user('alice')
+    make_legacy_meetings_table()
+    upgraded = upgrade_schema()
+    assert 'meetings: добавлена колонка telemost_link' in upgraded
+
+    make_legacy_meetings_table()
+    db.session.execute(text('ALTER TABLE meetings ADD COLUMN telemost_link VARCHAR(500)'))
+    db.session.commit()
+
+    old_id = add_meeting(user, datetime.utcnow() - timedelta(days=60), title='Старая')
+    ArchiveService.archive_finished(days=30)
+
+    # Без AUTOINCREMENT SQLite снова выдает id архивной встречи
+    reused_id = add_meeting(user, datetime.utcnow() - timedelta(days=50), title='Новая')
+    assert reused_id == old_id
+    with pytest.raises(ArchiveIdCollisionError):
+        ArchiveService.archive_finished(days=30)
+    assert Meeting.query.count() == 1
+
+    steps = upgrade_schema()
+    assert 'meetings: пересоздана с AUTOINCREMENT' in steps
+    db.session.expire_all()
+
+    renumbered = Meeting.query.one()
+    assert renumbered.id != old_id
+    assert MeetingParticipant.query.filter_by(meeting_id=renumbered.id).count() == 1
+
+    assert ArchiveService.archive_finished(days=30)['meetings'] == 1
+    assert ArchivedMeeting.query.count() == 2
+
+    fresh_id = add_meeting(user, datetime.utcnow() + timedelta(days=1))
+    assert fresh_id > renumbered.id
+    assert upgrade_schema() == []
+
+
+def test_my_meetings_pages_the_archive_with_grouped_counts(app, client, make_user):
+    from sqlalchemy import event
+    from conftest import login
+
+    user = make_user('alice')
+    guest = make_user('bob')
+    app.config['ARCHIVE_PAGE_SIZE'] = 3
+    for i in range(7):
+        meeting_id = add_meeting(user, datetime.utcnow() - timedelta(days=60 + i), title=f'Архивная {i}')
+        db.session.add(MeetingParticipant(user_id=guest.id, meeting_id=meeting_id))
+        db.session.commit()
+    ArchiveService.archive_finished(days=30)
+
+    login(client, 'alice')
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        first = client.get('/my_meetings').get_data(as_text=True)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert [f'Архивная {i}' in first for i in range(7)] == [True] * 3 + [False] * 4
+    assert first.count('Участников: 2/6') == 3
+    assert 'archive_page=2' in first
+    assert sum('meeting_participants_archive' in sql for sql in statements) <= 2
+
+    last = client.get('/my_meetings?archive_page=3').get_data(as_text=True)
+    assert 'Архивная 6' in last and 'Архивная 5' not in last
+    assert 'archive_page=4' not in last
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from conftest import login
+from meeting_service import MeetingService
+from models import db, Meeting, MeetingParticipant, User
+
+
+def feed_url(client):
+    client.get('/my_meetings')
+    user = User.query.filter_by(username='alice').first()
+    return f'/calendar/{user.calendar_token}.ics'
+
+
+def test_feed_lists_meetings_and_booked_rooms(app, client, make_user):
+    alice = make_user('alice')
+    bob = make_user('bob')
+    start = datetime.utcnow() + timedelta(days=1)
+
+    meeting = Meeting(title='Киноклуб', topic='Кино', language='Английский', level='B1',
+                      moderator_id=alice.id, scheduled_time=start,
+                      telemost_link='https://telemost.yandex.ru/j/1')
+    db.session.add(meeting)
+    db.session.flush()
+    db.session.add(MeetingParticipant(user_id=alice.id, meeting_id=meeting.id))
+    db.session.commit()
+
+    room, _ = MeetingService.create_room(bob.id, 'Игры', '', 'Видеоигры', 'Английский', 'A2',
+                                         start + timedelta(hours=3))
+
+    login(client, 'alice')
+    url = feed_url(client)
+    response = client.get(url)
+    etag = response.headers['ETag']
+    body = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert 'SUMMARY:Киноклуб' in body
+    assert 'URL:https://telemost.yandex.ru/j/1' in body
+    assert 'SUMMARY:Игры' not in body
+
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+
+    success, _ = MeetingService.join_room(alice.id, room.id)
+    assert success
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    body = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert f'UID:room-{room.id}@culturabridge' in body
+    assert body.index('SUMMARY:Киноклуб') < body.index('SUMMARY:Игры')
+
+
+def test_unknown_token_is_not_found(client):
+    assert client.get('/calendar/missing.ics').status_code == 404
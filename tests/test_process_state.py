@@ -0,0 +1,53 @@
+import gc
+import os
+import app as app_module
+import process_state
+import rate_limit
+from app import create_app
+from config import Config
+
+
+class ForkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+
+def test_factory_calls_do_not_accumulate_fork_callbacks():
+    create_app(ForkConfig)
+    registered = len(process_state._after_fork_callbacks)
+
+    for _ in range(3):
+        create_app(ForkConfig)
+
+    assert len(process_state._after_fork_callbacks) == registered
+
+
+def test_fork_hooks_do_not_keep_apps_alive():
+    gc.collect()
+    apps_before = len(app_module._apps)
+    stores_before = len(rate_limit._stores)
+
+    app = create_app(ForkConfig)
+    assert len(app_module._apps) == apps_before + 1
+    assert len(rate_limit._stores) == stores_before + 1
+
+    del app
+    gc.collect()
+    assert len(app_module._apps) == apps_before
+    assert len(rate_limit._stores) == stores_before
+
+
+def test_child_process_starts_with_fresh_state():
+    app = create_app(ForkConfig)
+    store = app.extensions['rate_limit']['store']
+    for _ in range(3):
+        store.consume('key', 3, 60)
+    assert store.consume('key', 3, 60)[0] is False
+
+    pid = os.fork()
+    if pid == 0:
+        # os.register_at_fork уже вызвал reinit_after_fork в дочернем процессе
+        os._exit(0 if store.consume('key', 3, 60)[0] else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert store.consume('key', 3, 60)[0] is False
@@ -0,0 +1,159 @@
+import sys
+import threading
+import types
+import pytest
+from conftest import login
+from app import create_app
+from config import Config
+from models import db
+from rate_limit import MemoryStore, SlidingWindowStore, LocalCounterClient, RateLimiter, parse_limit
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_limit():
+    assert parse_limit('10/minute') == (10, 60)
+    assert parse_limit('5/seconds') == (5, 1)
+
+
+def test_sliding_window_against_local_client():
+    clock = FakeClock(now=600.0)
+    store = SlidingWindowStore(LocalCounterClient(clock=clock), clock=clock)
+
+    assert [store.consume('ip', 3, 60)[0] for _ in range(4)] == [True, True, True, False]
+
+    # Через окно предыдущие 3 запроса учитываются с весом 50%
+    clock.now += 90
+    allowed, retry_after = store.consume('ip', 3, 60)
+    assert allowed
+    assert store.consume('ip', 3, 60)[0] is False
+    assert 1 <= store.consume('ip', 3, 60)[1] <= 60
+
+    # Отклоненные запросы не расходуют лимит
+    clock.now += 60
+    assert store.consume('ip', 3, 60)[0]
+
+
+def test_sliding_window_is_atomic_under_concurrency():
+    client = LocalCounterClient()
+    store = SlidingWindowStore(client)
+    barrier = threading.Barrier(32)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(store.consume('login', 5, 3600)[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 5
+
+
+def test_local_client_expires_and_evicts():
+    clock = FakeClock()
+    client = LocalCounterClient(max_keys=2, clock=clock)
+    client.incr('a')
+    client.expire('a', 10)
+    client.incr('b')
+    client.incr('c')
+    assert client.mget(['a', 'b', 'c']) == [None, 1, 1]
+
+    clock.now += 11
+    client.expire('b', 5)
+    clock.now += 6
+    assert client.mget(['b']) == [None]
+
+
+def test_memory_store_evicts_oldest_key():
+    store = MemoryStore(max_keys=2)
+    for key in 'abc':
+        store.consume(key, 1, 60)
+    assert list(store._buckets) == ['b', 'c']
+
+
+def test_login_rejected_before_database_work(tmp_path):
+    class LimitedConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'limited.db'}"
+        RATE_LIMIT_STORAGE = 'local'
+        RATE_LIMITS = {'accounts.login': {'methods': ['POST'], 'account': '2/minute'}}
+
+    app = create_app(LimitedConfig)
+    client = app.test_client()
+
+    from sqlalchemy import event
+    from models import db
+    with app.app_context():
+        db.create_all()
+        queries = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: queries.append(args[2]))
+
+    assert login(client, 'nobody', 'wrong').status_code == 200
+    assert login(client, 'Nobody', 'wrong').status_code == 200
+
+    queries.clear()
+    response = login(client, 'nobody', 'wrong')
+    assert response.status_code == 429
+    assert 'Retry-After' in response.headers
+    assert queries == []
+
+    assert client.get('/login').status_code == 200
+
+
+def test_storage_url_builds_shared_sliding_window(monkeypatch):
+    shared = LocalCounterClient()
+    urls = []
+
+    def from_url(url):
+        urls.append(url)
+        return shared
+
+    monkeypatch.setitem(sys.modules, 'redis', types.SimpleNamespace(
+        Redis=types.SimpleNamespace(from_url=from_url)
+    ))
+
+    config = {'RATE_LIMIT_STORAGE': 'redis', 'RATE_LIMIT_STORAGE_URL': 'redis://cache:6379/1'}
+    workers = [RateLimiter._create_store(config) for _ in range(2)]
+    assert urls == ['redis://cache:6379/1'] * 2
+
+    # Два воркера расходуют один общий лимит
+    assert [workers[i % 2].consume('login', 3, 60)[0] for i in range(4)] == [True, True, True, False]
+
+
+def test_redis_storage_requires_url():
+    with pytest.raises(ValueError):
+        RateLimiter._create_store({'RATE_LIMIT_STORAGE': 'redis'})
+
+
+def limited_app(tmp_path, proxy_fix):
+    class ProxiedConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'proxied.db'}"
+        RATE_LIMITS = {'api.check_username': {'ip': '1/minute'}}
+        PROXY_FIX_X_FOR = proxy_fix
+
+    app = create_app(ProxiedConfig)
+    with app.app_context():
+        db.create_all()
+    return app.test_client()
+
+
+def test_ip_limit_uses_forwarded_for_only_when_enabled(tmp_path):
+    def statuses(client):
+        return [
+            client.get('/api/check-username?username=x',
+                       headers={'X-Forwarded-For': ip}).status_code
+            for ip in ('10.0.0.1', '10.0.0.2')
+        ]
+
+    # Без ProxyFix все клиенты за прокси делят адрес прокси
+    assert statuses(limited_app(tmp_path, 0))[1] == 429
+    assert 429 not in statuses(limited_app(tmp_path, 1))
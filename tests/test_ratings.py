@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+from conftest import login
+from sqlalchemy import event
+from models import db, Meeting, MeetingParticipant, MeetingRoom, RoomParticipant, ModeratorReputation, TopicReputation
+from meeting_service import MeetingService
+from rating_service import RatingService
+
+
+def create_meeting(client, title, topic, scheduled_time):
+    response = client.post('/create_meeting', data={
+        'title': title,
+        'description': 'Описание',
+        'topic': topic,
+        'language': 'Английский',
+        'level': 'B1',
+        'scheduled_time': scheduled_time.strftime('%Y-%m-%dT%H:%M'),
+    })
+    assert response.status_code == 302
+    return int(response.location.rstrip('/').split('/')[-1])
+
+
+def finish(meeting_id):
+    meeting = db.session.get(Meeting, meeting_id)
+    meeting.scheduled_time = datetime.utcnow() - timedelta(hours=2)
+    db.session.commit()
+
+
+def test_participant_joins_and_rates_over_http(app, client, make_user):
+    make_user('moderator')
+    make_user('student')
+    start = datetime.utcnow() + timedelta(days=1)
+
+    login(client, 'moderator')
+    meeting_id = create_meeting(client, 'Киноклуб', 'Кино', start)
+    client.get('/logout')
+
+    login(client, 'student')
+    assert 'Присоединиться' in client.get(f'/meeting/{meeting_id}').get_data(as_text=True)
+    client.post(f'/meetings/{meeting_id}/join')
+    page = client.get(f'/meeting/{meeting_id}').get_data(as_text=True)
+    assert 'Присоединиться' not in page
+    assert 'Оцените встречу' not in page
+
+    finish(meeting_id)
+    assert 'Оцените встречу' in client.get(f'/meeting/{meeting_id}').get_data(as_text=True)
+
+    client.post(f'/meeting/{meeting_id}/rate', data={'rating': '4'})
+    client.post(f'/meeting/{meeting_id}/rate', data={'rating': '5'})
+
+    meeting = db.session.get(Meeting, meeting_id)
+    moderator_reputation = db.session.get(ModeratorReputation, meeting.moderator_id)
+    topic_reputation = db.session.get(TopicReputation, 'Кино')
+    assert (moderator_reputation.rating_count, moderator_reputation.rating_sum) == (1, 5)
+    assert (topic_reputation.rating_count, topic_reputation.rating_sum) == (1, 5)
+    assert RatingService.rebuild_reputation(dry_run=True) == {
+        'moderator_reputation': 0,
+        'topic_reputation': 0,
+    }
+
+
+def test_moderator_cannot_rate_own_meeting(app, client, make_user):
+    make_user('moderator')
+    login(client, 'moderator')
+    meeting_id = create_meeting(client, 'Киноклуб', 'Кино', datetime.utcnow() + timedelta(days=1))
+    finish(meeting_id)
+
+    client.post(f'/meeting/{meeting_id}/rate', data={'rating': '5'})
+    assert ModeratorReputation.query.count() == 0
+
+
+def test_meetings_sorted_by_moderator_reputation(app, client, make_user):
+    make_user('good')
+    make_user('weak')
+    make_user('student')
+    start = datetime.utcnow() + timedelta(days=1)
+
+    rated = {}
+    for moderator, rating in (('good', '5'), ('weak', '1')):
+        login(client, moderator)
+        rated[moderator] = create_meeting(client, f'Прошлая {moderator}', 'Кино', start)
+        client.get('/logout')
+        login(client, 'student')
+        client.post(f'/meetings/{rated[moderator]}/join')
+        finish(rated[moderator])
+        client.post(f'/meeting/{rated[moderator]}/rate', data={'rating': rating})
+        client.get('/logout')
+
+    # У слабого модератора встреча раньше - по дате она первая
+    login(client, 'weak')
+    create_meeting(client, 'Встреча weak', 'Спорт', start + timedelta(days=1))
+    client.get('/logout')
+    login(client, 'good')
+    create_meeting(client, 'Встреча good', 'Спорт', start + timedelta(days=2))
+
+    by_date = client.get('/meetings').get_data(as_text=True)
+    assert by_date.index('Встреча weak') < by_date.index('Встреча good')
+
+    by_reputation = client.get('/meetings?sort=reputation').get_data(as_text=True)
+    assert by_reputation.index('Встреча good') < by_reputation.index('Встреча weak')
+
+
+def test_room_participant_rates_over_http(app, client, make_user):
+    moderator = make_user('moderator', age=20)
+    make_user('student')
+    room, _ = MeetingService.create_room(moderator.id, 'Разговорный клуб', '', 'Путешествия',
+                                         'Английский', 'B1', datetime.utcnow() + timedelta(days=1))
+    room_id, moderator_id = room.id, moderator.id
+
+    login(client, 'student')
+    client.post(f'/rooms/{room_id}/join')
+    assert 'Оцените комнату' not in client.get('/my_meetings').get_data(as_text=True)
+
+    db.session.get(MeetingRoom, room_id).scheduled_time = datetime.utcnow() - timedelta(hours=2)
+    db.session.commit()
+    assert 'Оцените комнату' in client.get('/my_meetings').get_data(as_text=True)
+
+    client.post(f'/rooms/{room_id}/rate', data={'rating': '3'})
+
+    participant = RoomParticipant.query.filter(
+        RoomParticipant.room_id == room_id,
+        RoomParticipant.user_id != moderator_id
+    ).one()
+    assert participant.rating == 3
+    reputation = db.session.get(ModeratorReputation, moderator_id)
+    assert (reputation.rating_count, reputation.rating_sum) == (1, 3)
+    assert 'Ваша оценка: 3' in client.get('/my_meetings').get_data(as_text=True)
+
+
+def test_stale_first_rating_is_counted_once(app, make_user):
+    moderator = make_user('moderator')
+    student = make_user('student')
+    meeting = Meeting(title='Киноклуб', topic='Кино', language='Английский', level='B1',
+                      moderator_id=moderator.id, scheduled_time=datetime.utcnow() - timedelta(hours=2))
+    db.session.add(meeting)
+    db.session.flush()
+    db.session.add(MeetingParticipant(user_id=student.id, meeting_id=meeting.id))
+    db.session.commit()
+
+    # Участник прочитан до того, как параллельный запрос (двойной клик) сохранил оценку
+    stale = MeetingParticipant.query.filter_by(user_id=student.id).one()
+    assert stale.rating is None
+    with app.app_context():
+        assert RatingService.rate_meeting(student.id, meeting.id, 5)[0]
+        db.session.remove()
+
+    assert RatingService._save_rating(student.id, meeting, stale, 4)[0]
+
+    reputation = db.session.get(ModeratorReputation, moderator.id)
+    assert (reputation.rating_count, reputation.rating_sum) == (1, 4)
+    assert RatingService.rebuild_reputation(dry_run=True)['moderator_reputation'] == 0
+
+
+def test_meetings_list_query_count_does_not_grow_with_cards(app, client, make_user):
+    make_user('moderator')
+    login(client, 'moderator')
+
+    def count_queries():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            client.get('/meetings')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        return len(statements)
+
+    start = datetime.utcnow() + timedelta(days=1)
+    create_meeting(client, 'Первая', 'Кино', start)
+    few = count_queries()
+    for i in range(5):
+        create_meeting(client, f'Встреча {i}', 'Кино', start + timedelta(days=i + 1))
+    assert count_queries() == few
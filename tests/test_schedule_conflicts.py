@@ -0,0 +1,163 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from conftest import login
+from models import db, Meeting, MeetingParticipant
+from meeting_service import MeetingService
+
+START = datetime(2031, 5, 1, 18, 0)
+
+
+def add_meeting(moderator, scheduled_time, duration=60, title='Встреча', is_active=True):
+    meeting = Meeting(title=title, topic='Кино', language='Английский', level='B1',
+                      moderator_id=moderator.id, scheduled_time=scheduled_time,
+                      duration=duration, is_active=is_active)
+    db.session.add(meeting)
+    db.session.commit()
+    return meeting.id
+
+
+def create_room(user, scheduled_time, duration=60, title='Комната'):
+    return MeetingService.create_room(user.id, title, '', 'Кино', 'Английский', 'B1',
+                                      scheduled_time, duration=duration)
+
+
+def test_overlap_conflicts_but_back_to_back_does_not(app, make_user):
+    moderator = make_user('moderator', age=20)
+    user = make_user('student')
+    first = add_meeting(moderator, START, duration=90, title='Первая')
+    assert MeetingService.join_meeting(user.id, first)[0]
+
+    overlapping = add_meeting(moderator, START + timedelta(minutes=89))
+    back_to_back = add_meeting(moderator, START + timedelta(minutes=90))
+
+    success, message = MeetingService.join_meeting(user.id, overlapping)
+    assert not success
+    assert '«Первая»' in message and '01.05.2031 18:00' in message
+    assert MeetingService.join_meeting(user.id, back_to_back)[0]
+
+    # Встреча, заканчивающаяся ровно к началу, тоже не мешает
+    assert MeetingService.find_schedule_conflict(user.id, START - timedelta(minutes=60)) is None
+
+
+def test_cancelled_meeting_does_not_block(app, make_user):
+    moderator = make_user('moderator', age=20)
+    user = make_user('student')
+    cancelled = add_meeting(moderator, START, title='Отмененная')
+    db.session.add(MeetingParticipant(user_id=user.id, meeting_id=cancelled))
+    db.session.get(Meeting, cancelled).is_active = False
+    db.session.commit()
+
+    assert MeetingService.find_schedule_conflict(user.id, START) is None
+    assert MeetingService.join_meeting(user.id, add_meeting(moderator, START))[0]
+
+
+def test_room_blocks_meeting_and_meeting_blocks_room(app, make_user):
+    moderator = make_user('moderator', age=20)
+    room_owner = make_user('owner', age=20)
+
+    room, _ = create_room(room_owner, START, title='Моя комната')
+    success, message = MeetingService.join_meeting(room_owner.id, add_meeting(moderator, START + timedelta(minutes=30)))
+    assert not success
+    assert '«Моя комната»' in message
+
+    meeting_id = add_meeting(moderator, START + timedelta(days=1), title='Моя встреча')
+    room, message = create_room(moderator, START + timedelta(days=1, minutes=30))
+    assert room is None
+    assert '«Моя встреча»' in message
+
+    # Участие во встрече мешает войти в комнату в то же время
+    assert MeetingService.join_meeting(room_owner.id, meeting_id)[0]
+    clashing_room, _ = create_room(make_user('host', age=20), START + timedelta(days=1, minutes=45))
+    success, message = MeetingService.join_room(room_owner.id, clashing_room.id)
+    assert not success
+    assert '«Моя встреча»' in message
+
+
+def test_create_meeting_renders_conflict_and_link(app, client, make_user):
+    user = make_user('moderator', age=20)
+    existing = add_meeting(user, START, title='Киноклуб')
+
+    login(client, 'moderator')
+    response = client.post('/create_meeting', data={
+        'title': 'Новая',
+        'topic': 'Кино',
+        'language': 'Английский',
+        'level': 'B1',
+        'scheduled_time': (START + timedelta(minutes=30)).strftime('%Y-%m-%dT%H:%M'),
+    })
+
+    page = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert 'Время пересекается с вашей встречей «Киноклуб»' in page
+    assert f'href="/meeting/{existing}"' in page
+    assert Meeting.query.count() == 1
+
+
+def test_create_room_rejects_duration_above_cap(app, make_user):
+    user = make_user('moderator', age=20)
+    cap = app.config['MAX_MEETING_DURATION']
+
+    room, message = create_room(user, START, duration=cap + 1)
+    assert room is None
+    assert str(cap) in message
+    assert create_room(user, START, duration=cap)[0] is not None
+
+
+def test_conflict_query_is_a_time_range_not_a_history_scan(app, make_user):
+    user_id = make_user('student').id
+    statements = []
+
+    from sqlalchemy import event
+    listener = lambda conn, cursor, statement, params, *args: statements.append((statement, params))
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        MeetingService.find_schedule_conflict(user_id, START)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    plans = [
+        ' | '.join(row[-1] for row in db.session.connection().exec_driver_sql(
+            'EXPLAIN QUERY PLAN ' + statement, params
+        ))
+        for statement, params in statements
+    ]
+    assert len(plans) == 2
+    for plan in plans:
+        assert 'scheduled_time>? AND scheduled_time<?' in plan
+        assert 'user_id=? AND' in plan
+        assert 'LIST SUBQUERY' not in plan
+
+
+def test_parallel_joins_cannot_both_pass_the_check(app, make_user, monkeypatch):
+    moderator = make_user('moderator', age=20)
+    user = make_user('student')
+    meeting_ids = [add_meeting(moderator, START), add_meeting(moderator, START + timedelta(minutes=30))]
+    user_id = user.id
+
+    original = MeetingService.find_schedule_conflict
+
+    def slow_check(*args, **kwargs):
+        conflict = original(*args, **kwargs)
+        time.sleep(0.3)
+        return conflict
+
+    monkeypatch.setattr(MeetingService, 'find_schedule_conflict', staticmethod(slow_check))
+
+    barrier = threading.Barrier(2)
+    results = []
+
+    def worker(meeting_id):
+        with app.app_context():
+            barrier.wait()
+            results.append(MeetingService.join_meeting(user_id, meeting_id)[0])
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(meeting_id,)) for meeting_id in meeting_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == [False, True]
+    assert MeetingParticipant.query.filter_by(user_id=user_id).count() == 1
@@ -0,0 +1,14 @@
+# Точка входа для pre-fork серверов:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#   uwsgi --ini uwsgi.ini
+from app import create_app
+from process_state import reinit_after_fork
+
+app = create_app()
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    pass
+else:
+    postfork(reinit_after_fork)